@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Benchmark parsing and generating stages."""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, List, Optional
+
+from day import load_days
+from fetch import CustomJSONEncoder, DescriptionParser, extract_paper, get_rules
+from filetools import workspace_path
+from generate_ics import generate_ics
+
+PAPERS_DIR = workspace_path("scripts", "fixtures", "papers")
+
+
+def load_papers() -> List[dict]:
+    """Load bundled paper pages.
+
+    Returns:
+        List[dict]: Items of `fixtures/papers/index.json` with `html` field,
+            `synthetic` items are rebuilt from known paper text,
+            see `fixtures/papers/README.md`.
+    """
+
+    with open(os.path.join(PAPERS_DIR, "index.json"), "r", encoding="utf-8") as f:
+        ret = json.load(f)
+    for i in ret:
+        with open(os.path.join(PAPERS_DIR, i["file"]), "r", encoding="utf-8") as f:
+            i["html"] = f.read()
+    return ret
+
+
+def load_description_cases() -> List[dict]:
+    with open(
+        workspace_path("scripts", "description_parsing_cases.json"),
+        "r",
+        encoding="utf-8",
+    ) as f:
+        return json.load(f)
+
+
+def load_years() -> List[dict]:
+    ret = []
+    for i in sorted(os.listdir(workspace_path())):
+        if i.endswith(".json") and i[:-5].isdigit():
+            with open(workspace_path(i), "r", encoding="utf-8") as f:
+                ret.append(json.load(f))
+    return ret
+
+
+def create_stages(tempdir: str) -> Dict[str, Callable[[], None]]:
+    """Create stage functions, each call runs stage once over its corpus."""
+
+    papers = load_papers()
+    texts = [extract_paper(i["html"], i["url"]) for i in papers]
+    cases = load_description_cases()
+    years = load_years()
+    all_days = [j for i in years for j in load_days(i["days"])]
+    ics_filename = os.path.join(tempdir, "holiday-cn.ics")
+
+    def _extract_paper():
+        for i in papers:
+            extract_paper(i["html"], i["url"])
+
+    def _get_rules():
+        for i in texts:
+            for _ in get_rules(i):
+                pass
+
+    def _parse_description():
+        for i in cases:
+            for _ in DescriptionParser(i["description"], i["year"]).parse():
+                pass
+
+    def _generate_ics():
+        generate_ics(all_days, ics_filename)
+
+    def _generate_ics_icalendar():
+        generate_ics(all_days, ics_filename, engine="icalendar")
+
+    def _json_dump():
+        for i in years:
+            json.dumps(i, indent=4, ensure_ascii=False, cls=CustomJSONEncoder)
+
+    return {
+        "extract_paper": _extract_paper,
+        "get_rules": _get_rules,
+        "parse_description": _parse_description,
+        "generate_ics": _generate_ics,
+        "generate_ics_icalendar": _generate_ics_icalendar,
+        "json_dump": _json_dump,
+    }
+
+
+def measure(fn: Callable[[], None], min_time: float = 0.2, rounds: int = 3) -> dict:
+    """Measure stage speed and memory.
+
+    Args:
+        fn (Callable[[], None]): Stage function.
+        min_time (float): Min seconds for each timing round.
+        rounds (int): Timing rounds, best round is used.
+
+    Returns:
+        dict: `ops_per_sec`, `peak_bytes` and `retained_bytes` of one call.
+    """
+
+    fn()  # warm up
+    best = 0.0
+    for _ in range(rounds):
+        count = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time or not count:
+            fn()
+            count += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, count / elapsed)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return dict(
+        ops_per_sec=best,
+        peak_bytes=peak - before,
+        retained_bytes=after - before,
+    )
+
+
+def run(
+    stages: Optional[List[str]] = None, min_time: float = 0.2, rounds: int = 3
+) -> Dict[str, dict]:
+    with TemporaryDirectory() as tempdir:
+        all_stages = create_stages(tempdir)
+        return {
+            k: measure(v, min_time=min_time, rounds=rounds)
+            for k, v in all_stages.items()
+            if not stages or k in stages
+        }
+
+
+def compare(result: Dict[str, dict], baseline: Dict[str, dict], threshold: float):
+    """Find regressions compared to baseline.
+
+    Args:
+        result (Dict[str, dict]): Current result.
+        baseline (Dict[str, dict]): Baseline result.
+        threshold (float): Allowed slow down ratio, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: Regression messages.
+    """
+
+    ret = []
+    for k, v in result.items():
+        if k not in baseline:
+            continue
+        expected = baseline[k]["ops_per_sec"]
+        if v["ops_per_sec"] < expected * (1 - threshold):
+            ret.append(
+                "%s: %.1f ops/sec, baseline %.1f ops/sec (%+.1f%%)"
+                % (
+                    k,
+                    v["ops_per_sec"],
+                    expected,
+                    (v["ops_per_sec"] / expected - 1) * 100,
+                )
+            )
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("stage", nargs="*", help="stages to run, default is all")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--save", metavar="FILE", help="save result as json")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="fail when slower than baseline json"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slow down ratio compared to baseline, default is 0.2",
+    )
+    args = parser.parse_args()
+
+    result = run(args.stage, min_time=args.min_time, rounds=args.rounds)
+    for k, v in result.items():
+        print(
+            "%-20s %12.1f ops/sec %12d peak bytes %12d retained bytes"
+            % (k, v["ops_per_sec"], v["peak_bytes"], v["retained_bytes"])
+        )
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for i in regressions:
+            print("regression: " + i, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
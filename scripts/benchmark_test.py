@@ -0,0 +1,27 @@
+"""Test module `benchmark`."""
+
+from benchmark import compare, run
+
+
+def test_run():
+    result = run(["get_rules", "parse_description"], min_time=0, rounds=1)
+    assert sorted(result) == ["get_rules", "parse_description"]
+    for i in result.values():
+        assert i["ops_per_sec"] > 0
+        assert i["peak_bytes"] >= 0
+
+
+def test_compare():
+    baseline = {"a": {"ops_per_sec": 100.0}, "b": {"ops_per_sec": 100.0}}
+    result = {
+        "a": {"ops_per_sec": 85.0},
+        "b": {"ops_per_sec": 70.0},
+        "c": {"ops_per_sec": 1.0},
+    }
+    assert compare(result, baseline, 0.2) == [
+        "b: 70.0 ops/sec, baseline 100.0 ops/sec (-30.0%)"
+    ]
+    assert compare(result, baseline, 0.1) == [
+        "a: 85.0 ops/sec, baseline 100.0 ops/sec (-15.0%)",
+        "b: 70.0 ops/sec, baseline 100.0 ops/sec (-30.0%)",
+    ]
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Compare holiday data snapshots by date."""
+
+import argparse
+import json
+import os
+import re
+import sys
+import zipfile
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from day import Day, load_days
+from filetools import workspace_path
+
+CHANGES_LOG = workspace_path("changes.jsonl")
+
+_YEAR_FILE_RE = re.compile(r"(?:.*/)?(\d+)\.json$")
+
+
+def _merge(data: Iterable[dict]) -> Dict[date, Day]:
+    ret = {}
+    # later year wins, same as `HolidayIndex`
+    for i in sorted(data, key=lambda x: x["year"]):
+        for day in load_days(i["days"]):
+            ret[day.date] = day
+    return ret
+
+
+def load_snapshot(path: str) -> Dict[date, Day]:
+    """Load listed days from data directory or release zip.
+
+    Args:
+        path (str): Directory or zip that contains `{year}.json` files.
+
+    Returns:
+        Dict[date, Day]: Day by date, later year wins.
+    """
+
+    data = []
+    if os.path.isdir(path):
+        for i in os.listdir(path):
+            if _YEAR_FILE_RE.match(i):
+                with open(os.path.join(path, i), "r", encoding="utf-8") as f:
+                    data.append(json.load(f))
+    else:
+        with zipfile.ZipFile(path) as f:
+            for i in f.namelist():
+                if _YEAR_FILE_RE.match(i):
+                    data.append(json.loads(f.read(i).decode("utf-8")))
+    return _merge(data)
+
+
+def diff(old: Dict[date, Day], new: Dict[date, Day]) -> Iterator[dict]:
+    """Compare snapshots.
+
+    Args:
+        old (Dict[date, Day]): Snapshot before.
+        new (Dict[date, Day]): Snapshot after.
+
+    Returns:
+        Iterator[dict]: Changes in date order, `op` is one of
+            `added`, `removed` or `changed`, `old` and `new` are days
+            in `{year}.json` format or None.
+    """
+
+    for k in sorted(old.keys() | new.keys()):
+        before, after = old.get(k), new.get(k)
+        if before == after:
+            continue
+        if before is None:
+            op = "added"
+        elif after is None:
+            op = "removed"
+        else:
+            op = "changed"
+        yield {
+            "date": k.isoformat(),
+            "op": op,
+            "old": before.to_dict() if before else None,
+            "new": after.to_dict() if after else None,
+        }
+
+
+def write_changes(changes: Iterable[dict], f: TextIO) -> int:
+    """Write changes as json lines.
+
+    Returns:
+        int: Written line count.
+    """
+
+    count = 0
+    for i in changes:
+        f.write(json.dumps(i, ensure_ascii=False, sort_keys=True) + "\n")
+        count += 1
+    return count
+
+
+def append_log(
+    changes: List[dict], at: str, filename: Optional[str] = None
+) -> Optional[str]:
+    """Append changes to cumulative log.
+
+    Args:
+        changes (List[dict]): Changes from `diff`.
+        at (str): Revision of changes, e.g. release tag.
+        filename (Optional[str]): Defaults to `CHANGES_LOG`.
+
+    Returns:
+        Optional[str]: Filename, None when nothing to append.
+    """
+
+    if not changes:
+        return None
+    filename = filename or CHANGES_LOG
+    with open(filename, "a", encoding="utf-8", newline="\n") as f:
+        write_changes(({"at": at, **i} for i in changes), f)
+    return filename
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("old", help="data directory or release zip")
+    parser.add_argument("new", help="data directory or release zip")
+    parser.add_argument("--log", metavar="FILE", help="also append to changes log")
+    parser.add_argument("--at", default=date.today().isoformat(), help="log revision")
+    args = parser.parse_args(argv)
+
+    changes = list(diff(load_snapshot(args.old), load_snapshot(args.new)))
+    write_changes(changes, sys.stdout)
+    if args.log:
+        append_log(changes, args.at, args.log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Test module `changes`."""
+
+import io
+import json
+
+from changes import append_log, diff, load_snapshot, write_changes
+from pack import pack_json
+
+
+def test_diff(copy_data):
+    old = copy_data("old", 2023, 2024)
+    new = copy_data("new", 2023, 2024, 2025)
+    filename = new / "2024.json"
+    data = json.loads(filename.read_text(encoding="utf-8"))
+    data["days"][0]["isOffDay"] = False
+    removed = data["days"].pop()
+    filename.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    changes = list(diff(load_snapshot(str(old)), load_snapshot(str(new))))
+    by_op = {}
+    for i in changes:
+        by_op.setdefault(i["op"], []).append(i)
+    assert [i["date"] for i in by_op["changed"]] == [data["days"][0]["date"]]
+    assert by_op["changed"][0]["old"]["isOffDay"] is True
+    assert by_op["changed"][0]["new"]["isOffDay"] is False
+    assert by_op["removed"] == [
+        {"date": removed["date"], "op": "removed", "old": removed, "new": None}
+    ]
+    assert {i["date"][:4] for i in by_op["added"]} == {"2025"}
+    assert [i["date"] for i in changes] == sorted(i["date"] for i in changes)
+
+
+def test_zip_snapshot(tmp_path, copy_data):
+    dirname = copy_data("data", 2022, 2023)
+    filename = pack_json(str(tmp_path / "data.zip"), str(dirname))
+    snapshot = load_snapshot(filename)
+    assert snapshot == load_snapshot(str(dirname))
+    # 2023 paper wins for 2022-12-31
+    assert [i for i in snapshot.values() if i.date.isoformat() == "2022-12-31"]
+    assert list(diff(snapshot, snapshot)) == []
+
+
+def test_log(tmp_path, copy_data):
+    old = load_snapshot(str(copy_data("old", 2023)))
+    new = load_snapshot(str(copy_data("new", 2023, 2024)))
+    changes = list(diff(old, new))
+    filename = str(tmp_path / "changes.jsonl")
+    assert append_log([], "2024.01.01", filename) is None
+    append_log(changes, "2024.01.01", filename)
+    append_log(changes[:1], "2024.01.02", filename)
+    with open(filename, "r", encoding="utf-8") as f:
+        lines = [json.loads(i) for i in f]
+    assert len(lines) == len(changes) + 1
+    assert lines[-1] == {"at": "2024.01.02", **changes[0]}
+
+    f = io.StringIO()
+    assert write_changes(changes, f) == len(changes)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Command line interface of holiday-cn scripts.
+
+Command modules are imported only when used,
+so light commands like `query` not pay for `requests` or `icalendar`.
+"""
+
+import importlib
+import sys
+from typing import List, Optional
+
+COMMANDS = {
+    "fetch": ("fetch", "main", "fetch holiday data of a year from gov.cn"),
+    "update": ("update", "main", "update repository data"),
+    "build-ics": ("update", "build_ics", "regenerate ics from stored data"),
+    "pack": ("pack", "main", "build release artifacts"),
+    "query": ("query", "main", "query workday of dates"),
+    "export": ("export", "main", "export date range as ics or json"),
+    "changes": ("changes", "main", "compare data snapshots"),
+    "reparse": ("reparse", "main", "re-parse cached papers and compare with data"),
+    "serve": ("server", "main", "serve data files and queries over http"),
+}
+
+
+def _usage() -> str:
+    return "usage: cli.py COMMAND [ARGS...]\n\ncommands:\n" + "".join(
+        "  %-12s %s\n" % (k, v[2]) for k, v in COMMANDS.items()
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    # argparse subparsers require all command parsers to be built upfront,
+    # which means importing every command module.
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        sys.stdout.write(_usage())
+        return
+    if argv[0] not in COMMANDS:
+        sys.stderr.write("unknown command: %s\n\n%s" % (argv[0], _usage()))
+        sys.exit(2)
+    module, func, _ = COMMANDS[argv[0]]
+    getattr(importlib.import_module(module), func)(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Test module `cli`."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cli import main
+
+_DIRNAME = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = {"bs4", "requests", "urllib3", "icalendar", "tqdm", "numpy"}
+
+IMPORT_BUDGET = 0.2
+"""Max seconds of imports added by a command over bare interpreter."""
+
+
+def _import_times(*args):
+    """Self import time in seconds by module name."""
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=_DIRNAME,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+        check=True,
+    )
+    ret = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        ret[name.strip()] = int(self_us) / 1e6
+    return ret
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["query", "2024-01-01"],
+        ["query", "2024-01-01", "--to", "2024-02-01"],
+        ["build-ics", "--help"],
+        ["pack", "--help"],
+        ["export", "--help"],
+        ["changes", "--help"],
+        ["fetch", "--help"],
+    ],
+)
+def test_import_time(args):
+    baseline = _import_times("-c", "pass")
+    times = _import_times("cli.py", *args)
+    added = {k: v for k, v in times.items() if k not in baseline}
+    assert not HEAVY_MODULES & {i.split(".")[0] for i in added}
+    assert sum(added.values()) < IMPORT_BUDGET, sorted(
+        added.items(), key=lambda x: -x[1]
+    )[:5]
+
+
+def test_query(capsys):
+    main(["query", "2024-02-04", "2024-02-10"])
+    lines = [json.loads(i) for i in capsys.readouterr().out.splitlines()]
+    assert [(i["isWorkday"], i["name"]) for i in lines] == [
+        (True, "春节"),
+        (False, "春节"),
+    ]
+
+    main(["query", "2024-02-01", "--to", "2024-03-01"])
+    assert capsys.readouterr().out == "18\n"
+
+    with pytest.raises(SystemExit) as ex:
+        main(["query", "--check", "2024-02-10"])
+    assert ex.value.code == 1
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["query", "2024-02-04", "2030-01-01"],
+        ["query", "2024-02-01", "--to", "2030-01-01"],
+        ["query", "--check", "2030-01-01"],
+    ],
+)
+def test_query_out_of_range(capsys, argv):
+    with pytest.raises(SystemExit) as ex:
+        main(argv)
+    assert ex.value.code == 2
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "out of range" in captured.err
+
+
+def test_unknown_command(capsys):
+    with pytest.raises(SystemExit):
+        main(["unknown"])
+    assert "build-ics" in capsys.readouterr().err
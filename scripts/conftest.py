@@ -0,0 +1,145 @@
+"""Shared test fixtures."""
+
+import os
+import re
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from fetch import FetchClient
+from filetools import workspace_path
+from replay import Archive, record, replay
+
+REPLAY_ARCHIVE = workspace_path("scripts", "fixtures", "gov-cn.zip")
+"""Recorded gov.cn responses for tests that fetch real papers.
+
+Tests use live network when archive not exists. Set `HOLIDAY_CN_RECORD=1`
+to record live responses of these tests into archive, from repository root:
+`HOLIDAY_CN_RECORD=1 python -m pytest scripts/fetch_test.py -k test_get_`
+"""
+
+_DATA_FILE_RE = re.compile(r"(\d+|holiday-cn)\.(json|ics)$")
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+class StubServer:
+    """Local HTTP server that serves configured responses."""
+
+    def __init__(self):
+        self.routes: Dict[str, Union[List[Response], Callable[..., Response]]] = {}
+        self.requests: List[dict] = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def url(self, path: str = "/") -> str:
+        return "http://127.0.0.1:%d%s" % (self._httpd.server_address[1], path)
+
+    def add(self, path: str, body, status=200, headers=None):
+        """Queue response for path, last response is reused."""
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.routes.setdefault(path, []).append((status, headers or {}, body))
+
+    def route(self, path: str, handler: Callable[..., Response]):
+        """Serve path with `handler(query, headers)`."""
+
+        self.routes[path] = handler
+
+    def _respond(self, path: str, query: dict, headers: dict) -> Response:
+        with self._lock:
+            route = self.routes.get(path)
+            if route is None:
+                return 404, {}, b"not found"
+            if not callable(route):
+                return route.pop(0) if len(route) > 1 else route[0]
+        # handler may block, e.g. to check concurrent requests
+        return route(query, headers)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                # pylint:disable=invalid-name
+                url = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                headers = dict(self.headers.items())
+                with server._lock:
+                    server.requests.append(
+                        dict(
+                            path=url.path,
+                            query=query,
+                            headers=headers,
+                            port=self.client_address[1],
+                        )
+                    )
+                status, resp_headers, body = server._respond(url.path, query, headers)
+                self.send_response(status)
+                for k, v in resp_headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture(name="stub_server")
+def _stub_server():
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(name="copy_data")
+def _copy_data(tmp_path):
+    """Copy workspace data into new directory under `tmp_path`.
+
+    Returns function that takes directory name and years, copies
+    `{year}.json` of years, or all year and `holiday-cn` json and ics files
+    when no year given, and returns the directory.
+    """
+
+    def _copy(name: str, *years: int):
+        dirname = tmp_path / name
+        dirname.mkdir()
+        names = [f"{i}.json" for i in years] or [
+            i for i in os.listdir(workspace_path()) if _DATA_FILE_RE.match(i)
+        ]
+        for i in names:
+            shutil.copy(workspace_path(i), dirname / i)
+        return dirname
+
+    return _copy
+
+
+@pytest.fixture(name="client")
+def _client():
+    with FetchClient() as client:
+        if os.getenv("HOLIDAY_CN_RECORD"):
+            record(client.session, Archive(REPLAY_ARCHIVE))
+        elif os.path.exists(REPLAY_ARCHIVE):
+            replay(client.session, Archive(REPLAY_ARCHIVE))
+        yield client
@@ -0,0 +1,50 @@
+"""Day record of holiday data."""
+
+import datetime
+import sys
+from typing import Any, Iterable, List, NamedTuple
+
+
+def cast_date(v: Any) -> datetime.date:
+    if isinstance(v, datetime.date):
+        return v
+    if isinstance(v, str):
+        return datetime.date.fromisoformat(v)
+    raise NotImplementedError("can not convert to date: %s" % v)
+
+
+class Day(NamedTuple):
+    """Day listed in holiday data.
+
+    Dict with `name`, `date` and `isOffDay` is only used for json,
+    see `from_dict` and `to_dict`.
+    """
+
+    name: str
+    date: datetime.date
+    is_off_day: bool
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Day":
+        """Create from `{year}.json` format, holiday name is interned."""
+
+        return cls(
+            sys.intern(data["name"]), cast_date(data["date"]), bool(data["isOffDay"])
+        )
+
+    def to_dict(self) -> dict:
+        """Convert to `{year}.json` format."""
+
+        return {
+            "name": self.name,
+            "date": self.date.isoformat(),
+            "isOffDay": self.is_off_day,
+        }
+
+
+def load_days(items: Iterable[dict]) -> List[Day]:
+    return [Day.from_dict(i) for i in items]
+
+
+def dump_days(days: Iterable[Day]) -> List[dict]:
+    return [i.to_dict() for i in days]
@@ -0,0 +1,16 @@
+"""Test module `day`."""
+
+import json
+from datetime import date
+
+from day import Day, dump_days, load_days
+from filetools import workspace_path
+
+
+def test_roundtrip():
+    with open(workspace_path("2024.json"), "r", encoding="utf-8") as f:
+        expected = json.load(f)["days"]
+    days = load_days(expected)
+    assert days[0] == Day("元旦", date(2024, 1, 1), True)
+    assert dump_days(days) == expected
+    assert days[1].name is days[2].name
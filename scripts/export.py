@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Export holiday data of a date range as ics or json."""
+
+import argparse
+import io
+import json
+import sys
+from datetime import date
+from typing import BinaryIO, List, Optional
+
+from day import Day, dump_days
+from generate_ics import write_ics
+from query import HolidayIndex, get_index
+
+KINDS = ("off", "work")
+"""Filter for `isOffDay`, `off` for holidays and `work` for make-up workdays."""
+
+FORMATS = ("ics", "json")
+
+
+def select_days(
+    index: HolidayIndex,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    kind: Optional[str] = None,
+    name: Optional[str] = None,
+) -> List[Day]:
+    """Select listed days from merged data.
+
+    Args:
+        index (HolidayIndex): Merged data.
+        start (Optional[date]): Range start, included.
+        end (Optional[date]): Range end, excluded.
+        kind (Optional[str]): One of `KINDS`, None for all days.
+        name (Optional[str]): Only days of this holiday.
+
+    Raises:
+        ValueError: When kind is unknown.
+
+    Returns:
+        List[Day]: Days in date order.
+    """
+
+    if kind is not None and kind not in KINDS:
+        raise ValueError("unknown kind: %s" % (kind,))
+    is_off_day = None if kind is None else kind == "off"
+    return [
+        i
+        for i in index.iter_days(start, end)
+        if (is_off_day is None or i.is_off_day == is_off_day)
+        and (name is None or i.name == name)
+    ]
+
+
+def write_json(days: List[Day], f: BinaryIO) -> None:
+    f.write(
+        json.dumps({"days": dump_days(days)}, indent=4, ensure_ascii=False).encode(
+            "utf-8"
+        )
+    )
+
+
+WRITERS = {
+    "ics": write_ics,
+    "json": write_json,
+}
+
+
+def export(
+    f: BinaryIO,
+    fmt: str = "ics",
+    index: Optional[HolidayIndex] = None,
+    **kwargs,
+) -> None:
+    """Write selected days to file object.
+
+    Args:
+        f (BinaryIO): Output file.
+        fmt (str): One of `FORMATS`.
+        index (Optional[HolidayIndex]): Defaults to `get_index()`.
+        **kwargs: Filters for `select_days`.
+    """
+
+    if fmt not in WRITERS:
+        raise ValueError("unknown format: %s" % (fmt,))
+    WRITERS[fmt](select_days(index or get_index(), **kwargs), f)
+
+
+def export_bytes(fmt: str = "ics", index: Optional[HolidayIndex] = None, **kwargs):
+    """Same as `export`, but returns bytes."""
+
+    f = io.BytesIO()
+    export(f, fmt, index, **kwargs)
+    return f.getvalue()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--from", dest="start", type=date.fromisoformat, help="start date, included"
+    )
+    parser.add_argument(
+        "--to", dest="end", type=date.fromisoformat, help="end date, excluded"
+    )
+    parser.add_argument("--kind", choices=KINDS, help="only off days or workdays")
+    parser.add_argument("--name", help="only days of this holiday")
+    parser.add_argument("--format", choices=FORMATS, default="ics")
+    parser.add_argument("--output", "-o", help="output file, default is stdout")
+    args = parser.parse_args(argv)
+
+    kwargs = dict(start=args.start, end=args.end, kind=args.kind, name=args.name)
+    if args.output:
+        with open(args.output, "wb") as f:
+            export(f, args.format, **kwargs)
+    else:
+        export(sys.stdout.buffer, args.format, **kwargs)
+
+
+if __name__ == "__main__":
+    main()
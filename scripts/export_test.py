@@ -0,0 +1,48 @@
+"""Test module `export`."""
+
+import io
+import json
+from datetime import date
+
+from day import Day, load_days
+from export import export_bytes, select_days
+from filetools import workspace_path
+from generate_ics import write_ics
+from query import get_index
+
+
+def test_select_days():
+    days = select_days(get_index(), date(2024, 2, 1), date(2024, 3, 1))
+    assert days[0] == Day("春节", date(2024, 2, 4), False)
+    assert all(date(2024, 2, 1) <= i.date < date(2024, 3, 1) for i in days)
+
+    off = select_days(get_index(), date(2024, 1, 1), date(2025, 1, 1), kind="off")
+    assert off and all(i.is_off_day for i in off)
+    work = select_days(get_index(), date(2024, 1, 1), date(2025, 1, 1), kind="work")
+    assert work and not any(i.is_off_day for i in work)
+    assert len(off) + len(work) == len(
+        select_days(get_index(), date(2024, 1, 1), date(2025, 1, 1))
+    )
+
+    assert {
+        i.name
+        for i in select_days(
+            get_index(), date(2024, 1, 1), date(2025, 1, 1), name="国庆节"
+        )
+    } == {"国庆节"}
+
+
+def test_select_days_out_of_range():
+    assert select_days(get_index(), date(1900, 1, 1), date(1900, 2, 1)) == []
+    assert select_days(get_index(), end=date(2007, 1, 1))
+
+
+def test_export_same_as_year_file():
+    with open(workspace_path("2024.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    kwargs = dict(start=date(2024, 1, 1), end=date(2025, 1, 1))
+    assert json.loads(export_bytes("json", **kwargs))["days"] == data["days"]
+
+    f = io.BytesIO()
+    write_ics(load_days(data["days"]), f)
+    assert export_bytes("ics", **kwargs) == f.getvalue()
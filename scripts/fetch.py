@@ -2,14 +2,39 @@
 """Fetch holidays from gov.cn"""
 
 import argparse
+import asyncio
 import json
 import re
+import sys
+from concurrent.futures import Executor
 from datetime import date, timedelta
-from itertools import chain
-from typing import Iterator, List, Optional, Tuple
-
-import bs4
-import requests
+from html.parser import HTMLParser
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+from urllib.parse import urlencode, urlsplit
+
+from day import Day, dump_days
+import metrics
+from httpcache import CacheEntry, HTTPCache
+
+if TYPE_CHECKING:
+    # requests and aiohttp are slow to import, imported on use.
+    import aiohttp
+    import requests
+
+SEARCH_URL = "https://sousuo.www.gov.cn/search-gov/data"
+SEARCH_PAGE_SIZE = 20
+SEARCH_PREFETCH_PAGES = 4
+"""Max search pages requested at a time after first page."""
 
 PAPER_EXCLUDE = [
     "http://www.gov.cn/zhengce/zhengceku/2014-09/29/content_9102.htm",
@@ -21,53 +46,23 @@ PAPER_INCLUDE = {
 
 PRE_PARSED_PAPERS = {
     "http://www.gov.cn/zhengce/zhengceku/2015-05/13/content_9742.htm": [
-        {
-            "name": "抗日战争暨世界反法西斯战争胜利70周年纪念日",
-            "date": date(2015, 9, 3),
-            "isOffDay": True,
-        },
-        {
-            "name": "抗日战争暨世界反法西斯战争胜利70周年纪念日",
-            "date": date(2015, 9, 4),
-            "isOffDay": True,
-        },
-        {
-            "name": "抗日战争暨世界反法西斯战争胜利70周年纪念日",
-            "date": date(2015, 9, 5),
-            "isOffDay": True,
-        },
-        {
-            "name": "抗日战争暨世界反法西斯战争胜利70周年纪念日",
-            "date": date(2015, 9, 6),
-            "isOffDay": False,
-        },
+        Day("抗日战争暨世界反法西斯战争胜利70周年纪念日", date(2015, 9, 3), True),
+        Day("抗日战争暨世界反法西斯战争胜利70周年纪念日", date(2015, 9, 4), True),
+        Day("抗日战争暨世界反法西斯战争胜利70周年纪念日", date(2015, 9, 5), True),
+        Day("抗日战争暨世界反法西斯战争胜利70周年纪念日", date(2015, 9, 6), False),
     ],
     "http://www.gov.cn/zhengce/zhengceku/2020-01/27/content_5472352.htm": [
-        {
-            "name": "春节",
-            "date": date(2020, 1, 31),
-            "isOffDay": True,
-        },
-        {
-            "name": "春节",
-            "date": date(2020, 2, 1),
-            "isOffDay": True,
-        },
-        {
-            "name": "春节",
-            "date": date(2020, 2, 2),
-            "isOffDay": True,
-        },
-        {
-            "name": "春节",
-            "date": date(2020, 2, 3),
-            "isOffDay": False,
-        },
+        Day("春节", date(2020, 1, 31), True),
+        Day("春节", date(2020, 2, 1), True),
+        Day("春节", date(2020, 2, 2), True),
+        Day("春节", date(2020, 2, 3), False),
     ],
 }
 
 
-def _raise_for_status_200(resp: requests.Response):
+def _raise_for_status_200(resp: "requests.Response"):
+    import requests
+
     resp.raise_for_status()
     if resp.status_code != 200:
         raise requests.HTTPError(
@@ -76,87 +71,687 @@ def _raise_for_status_200(resp: requests.Response):
         )
 
 
-def _get_paper_urls(year: int) -> Iterator[str]:
-    has_next_page = True
-    page_index = 0
-    while has_next_page:
-        resp = requests.get(
-            "https://sousuo.www.gov.cn/search-gov/data",
-            params={
-                "t": "zhengcelibrary_gw",
-                "p": page_index,
-                "n": 5,
-                "q": "假期 %d" % (year,),
-                "pcodeJiguan": "国办发明电",
-                "puborg": "国务院办公厅",
-                "filetype": "通知",
-                "sort": "pubtime",
-            },
+class FetchClient:
+    """HTTP client for gov.cn requests.
+
+    Connections are pooled and kept alive in one session,
+    connection errors and 5xx responses are retried with exponential backoff.
+
+    Args:
+        timeout (Union[float, Tuple[float, float]]): (connect, read) seconds.
+        retries (int): Max retry count for each request.
+        backoff_factor (float): Retry sleeps `backoff_factor * 2 ** (n - 1)`.
+        pool_size (int): Max kept alive connections for each host.
+        search_url (str): Policy search api url.
+        search_page_size (int): Results per search page.
+        cache (Optional[HTTPCache]): Revalidate cached responses with
+            conditional GET, pinned entries are used without request.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: Union[float, Tuple[float, float]] = (10, 30),
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_size: int = 10,
+        search_url: str = SEARCH_URL,
+        search_page_size: int = SEARCH_PAGE_SIZE,
+        cache: Optional[HTTPCache] = None,
+    ):
+        self.timeout = timeout
+        self.search_url = search_url
+        self.search_page_size = search_page_size
+        self.cache = cache
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util import Retry
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                status_forcelist=range(500, 600),
+                backoff_factor=backoff_factor,
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _send(self, url: str, **kwargs) -> "requests.Response":
+        host = urlsplit(url).hostname
+        with metrics.timer("http_request_seconds", host=host):
+            resp = self.session.get(url, **kwargs)
+        metrics.count("http_requests", host=host, status=resp.status_code)
+        metrics.count("http_response_bytes", len(resp.content), host=host)
+        return resp
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        """Send GET request, raise error if response status is not 200."""
+
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        if self.cache is None:
+            resp = self._send(url, **kwargs)
+            _raise_for_status_200(resp)
+            return resp
+
+        url = (
+            requests.Request("GET", url, params=kwargs.pop("params", None))
+            .prepare()
+            .url
         )
+        entry = self.cache.get(url)
+        if entry and entry.permanent:
+            metrics.count("http_cache", result="hit")
+            return _cached_response(entry)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            headers.update(entry.conditional_headers())
+        resp = self._send(url, headers=headers, **kwargs)
+        if entry and resp.status_code == 304:
+            metrics.count("http_cache", result="revalidated")
+            return _cached_response(entry)
+        metrics.count("http_cache", result="miss")
         _raise_for_status_200(resp)
-        data = resp.json()
-        if data["code"] == 1001:
-            # no match
-            return
-        assert data["code"] == 200, "%s: %s: %s" % (
-            resp.url,
-            data["code"],
-            data["msg"],
+        self.cache.put(url, resp.content, resp.headers)
+        return resp
+
+    def pin(self, url: str):
+        """Mark cached response as permanent, no-op when cache disabled."""
+
+        if self.cache is not None:
+            self.cache.pin(url)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _cached_response(entry: CacheEntry) -> "requests.Response":
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = entry.url
+    resp.headers = CaseInsensitiveDict(entry.headers)
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.request = requests.Request("GET", entry.url).prepare()
+    resp._content = entry.body  # pylint:disable=protected-access
+    return resp
+
+
+class AsyncFetchClient:
+    """Asyncio HTTP client for gov.cn requests, requires `aiohttp`.
+
+    Same as `FetchClient`, but concurrent requests of each host are limited
+    by a semaphore, connections are pooled in one session
+    that opened by `async with`.
+
+    Args:
+        timeout (Union[float, Tuple[float, float]]): (connect, read) seconds.
+        retries (int): Max retry count for each request.
+        backoff_factor (float): Retry sleeps `backoff_factor * 2 ** (n - 1)`.
+        pool_size (int): Max connections.
+        per_host (int): Max concurrent requests for each host.
+        search_url (str): Policy search api url.
+        search_page_size (int): Results per search page.
+        cache (Optional[HTTPCache]): Revalidate cached responses with
+            conditional GET, pinned entries are used without request.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: Union[float, Tuple[float, float]] = (10, 30),
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_size: int = 10,
+        per_host: int = 4,
+        search_url: str = SEARCH_URL,
+        search_page_size: int = SEARCH_PAGE_SIZE,
+        cache: Optional[HTTPCache] = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.search_url = search_url
+        self.search_page_size = search_page_size
+        self.cache = cache
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def _send(
+        self, url: str, headers: dict
+    ) -> Tuple["aiohttp.ClientResponse", bytes]:
+        import aiohttp
+        from yarl import URL
+
+        host = urlsplit(url).hostname
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        retry = 0
+        while True:
+            try:
+                async with semaphore:
+                    with metrics.timer("http_request_seconds", host=host):
+                        async with self.session.get(
+                            URL(url, encoded=True), headers=headers
+                        ) as resp:
+                            body = await resp.read()
+                metrics.count("http_requests", host=host, status=resp.status)
+                metrics.count("http_response_bytes", len(body), host=host)
+                if resp.status < 500 or retry >= self.retries:
+                    return resp, body
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if retry >= self.retries:
+                    raise
+            retry += 1
+            await asyncio.sleep(self.backoff_factor * 2 ** (retry - 1))
+
+    async def get(self, url: str, params: Optional[dict] = None) -> bytes:
+        """Send GET request, raise error if response status is not 200.
+
+        Returns:
+            bytes: Response body.
+        """
+
+        import aiohttp
+
+        if params:
+            # same as url prepared by `requests`, so cache is shared.
+            url += ("&" if urlsplit(url).query else "?") + urlencode(params)
+        entry = self.cache.get(url) if self.cache is not None else None
+        if entry and entry.permanent:
+            metrics.count("http_cache", result="hit")
+            return entry.body
+        resp, body = await self._send(url, entry.conditional_headers() if entry else {})
+        if entry and resp.status == 304:
+            metrics.count("http_cache", result="revalidated")
+            return entry.body
+        if self.cache is not None:
+            metrics.count("http_cache", result="miss")
+        if resp.status != 200:
+            raise aiohttp.ClientResponseError(
+                resp.request_info,
+                resp.history,
+                status=resp.status,
+                message="request failed: %d: %s" % (resp.status, url),
+            )
+        if self.cache is not None:
+            self.cache.put(url, body, resp.headers)
+        return body
+
+    def pin(self, url: str):
+        """Mark cached response as permanent, no-op when cache disabled."""
+
+        if self.cache is not None:
+            self.cache.pin(url)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        connect, read = (
+            self.timeout if isinstance(self.timeout, tuple) else (self.timeout,) * 2
+        )
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
         )
-        for i in data["searchVO"]["listVO"]:
-            if str(year) in i["title"]:
-                yield i["url"]
-        page_index += 1
-        has_next_page = page_index < data["searchVO"]["totalpage"]
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+
+_default_client: Optional[FetchClient] = None
 
 
-def get_paper_urls(year: int) -> List[str]:
+def get_default_client() -> FetchClient:
+    """Client shared by module functions when no client given."""
+
+    global _default_client  # pylint:disable=global-statement
+    if _default_client is None:
+        _default_client = FetchClient()
+    return _default_client
+
+
+def _search_query(years: List[int]) -> str:
+    # query without year to cover all years, filtered by title.
+    # results may rank differently from per-year query,
+    # so it is only used for batch search.
+    return "假期 %d" % (years[0],) if len(years) == 1 else "假期"
+
+
+def _search_params(query: str, page_index: int, page_size: int) -> dict:
+    return {
+        "t": "zhengcelibrary_gw",
+        "p": page_index,
+        "n": page_size,
+        "q": query,
+        "pcodeJiguan": "国办发明电",
+        "puborg": "国务院办公厅",
+        "filetype": "通知",
+        "sort": "pubtime",
+    }
+
+
+def _pubtime_year(item: dict) -> Optional[int]:
+    if item.get("pubtimeStr"):
+        return int(item["pubtimeStr"][:4])
+    if isinstance(item.get("pubtime"), (int, float)):
+        # milliseconds timestamp
+        return (
+            date(1970, 1, 1) + timedelta(hours=8, milliseconds=item["pubtime"])
+        ).year
+    return None
+
+
+def _search_result(
+    years: List[int], data: dict, url: str
+) -> Tuple[List[Tuple[int, str]], int, bool]:
+    """Parse search api response.
+
+    Returns:
+        Tuple[List[Tuple[int, str]], int, bool]: (year, url) of related papers,
+            total page count, and whether later pages are older than all years.
+    """
+
+    metrics.count("search_pages", year=",".join(str(i) for i in years))
+    if data["code"] == 1001:
+        # no match
+        return [], 0, True
+    assert data["code"] == 200, "%s: %s: %s" % (
+        url,
+        data["code"],
+        data["msg"],
+    )
+    items = data["searchVO"]["listVO"]
+    pubtime_years = [_pubtime_year(i) for i in items]
+    return (
+        [(year, i["url"]) for i in items for year in years if str(year) in i["title"]],
+        data["searchVO"]["totalpage"],
+        # sorted by pubtime desc, papers of year publish since previous year
+        bool(items)
+        and None not in pubtime_years
+        and pubtime_years == sorted(pubtime_years, reverse=True)
+        and pubtime_years[-1] < min(years) - 1,
+    )
+
+
+def _select_paper_urls(
+    years: List[int], matched: Iterable[Tuple[int, str]]
+) -> Dict[int, List[str]]:
+    ret = {i: [] for i in years}
+    for year, url in matched:
+        if url not in PAPER_EXCLUDE and url not in ret[year]:
+            ret[year].append(url)
+    for year, urls in ret.items():
+        urls += PAPER_INCLUDE.get(year, [])
+        urls.sort()
+        if not urls and date.today().year >= year:
+            raise RuntimeError("could not found papers for %d" % (year,))
+    return ret
+
+
+def get_paper_urls_batch(
+    years: Iterable[int],
+    client: Optional[FetchClient] = None,
+    executor: Optional[Executor] = None,
+) -> Dict[int, List[str]]:
+    """Find related paper urls of years with one search query.
+
+    Page count is learned from first page, following pages are fetched
+    `SEARCH_PREFETCH_PAGES` at a time, until results older than all years.
+    Query of several years does not contain year, so results may differ
+    from `get_paper_urls` of each year.
+
+    Args:
+        years (Iterable[int]): eg. [2018, 2019]
+        client (Optional[FetchClient]): Defaults to `get_default_client()`.
+        executor (Optional[Executor]): Fetch following pages concurrently
+            with executor.
+
+    Returns:
+        Dict[int, List[str]]: Urls of each year, sort by publish time.
+    """
+
+    years = sorted(set(years))
+    client = client or get_default_client()
+    query = _search_query(years)
+
+    def _page(page_index):
+        resp = client.get(
+            client.search_url,
+            params=_search_params(query, page_index, client.search_page_size),
+        )
+        return _search_result(years, resp.json(), resp.url)
+
+    matched, total_page, done = _page(0)
+    page_index = 1
+    while not done and page_index < total_page:
+        pages = range(page_index, min(page_index + SEARCH_PREFETCH_PAGES, total_page))
+        for page_matched, _, done in (
+            executor.map(_page, pages) if executor else map(_page, pages)
+        ):
+            matched += page_matched
+            if done:
+                break
+        page_index = pages.stop
+    return _select_paper_urls(years, matched)
+
+
+def get_paper_urls(
+    year: int,
+    client: Optional[FetchClient] = None,
+    executor: Optional[Executor] = None,
+) -> List[str]:
     """Find year related paper urls.
 
     Args:
         year (int): eg. 2018
+        client (Optional[FetchClient]): Defaults to `get_default_client()`.
+        executor (Optional[Executor]): Fetch following pages concurrently
+            with executor.
 
     Returns:
         List[str]: Urls， sort by publish time.
     """
 
-    ret = [i for i in _get_paper_urls(year) if i not in PAPER_EXCLUDE]
-    ret += PAPER_INCLUDE.get(year, [])
-    ret.sort()
-    if not ret and date.today().year >= year:
-        raise RuntimeError("could not found papers for %d" % (year,))
-    return ret
+    return get_paper_urls_batch([year], client, executor)[year]
 
 
-def get_paper(url: str) -> str:
+def get_paper(url: str, client: Optional[FetchClient] = None) -> str:
     """Extract paper text from url.
 
     Args:
         url (str): Paper url.
+        client (Optional[FetchClient]): Defaults to `get_default_client()`.
 
     Returns:
         str: Extracted paper text.
     """
 
-    response = requests.get(url)
-    _raise_for_status_200(response)
+    response = (client or get_default_client()).get(url)
+    metrics.count("papers_downloaded")
     response.encoding = "utf-8"
-    soup = bs4.BeautifulSoup(response.text, features="html.parser")
-    container = soup.find(id="UCAP-CONTENT")
-    assert isinstance(
-        container, bs4.Tag
-    ), f"Can not get paper container from url: {url}"
-    p = bs4.BeautifulSoup(
-        container.decode().replace("<br/>", "</p><p>"), features="html.parser"
-    ).find_all("p")
-    ret = "\n".join((i.get_text().strip() for i in p))
+    return extract_paper(response.text, url)
+
+
+class _PaperParser(HTMLParser):
+    """Collect paragraph text of paper container in one pass.
+
+    Output is same as parsing with `bs4` html.parser builder,
+    re-parsing container html with `<br/>` replaced by `</p><p>`,
+    then joining stripped text of all `<p>`.
+    """
+
+    # same as `bs4.builder.HTMLTreeBuilder.empty_element_tags`
+    VOID_ELEMENTS = {
+        *("area", "base", "br", "col", "embed", "hr", "img", "input", "keygen"),
+        *("link", "menuitem", "meta", "param", "source", "track", "wbr"),
+        *("basefont", "bgsound", "command", "frame", "image", "isindex"),
+        *("nextid", "spacer"),
+    }
+    # strings of these elements are excluded by `bs4.Tag.get_text`
+    NO_TEXT_ELEMENTS = {"script", "style", "template"}
+    PRESERVE_WHITESPACE_ELEMENTS = {"pre", "textarea"}
+
+    def __init__(self, container_id: str):
+        super().__init__()
+        self.container_id = container_id
+        self.found = False
+        self.lines: List[List[str]] = []
+        # tag names of whole document
+        self._outer: List[str] = []
+        self._container_index = -1
+        self._done = False
+        # (tag name, line index or -1) of container html re-parsed
+        self._inner: List[Tuple[str, int]] = []
+        self._no_text_depth = 0
+        # `bs4` ignores end tag of void element started without `/>`
+        self._closed_void: List[str] = []
+        # text since last markup, in whole document and in container html
+        self._outer_text: List[str] = []
+        self._inner_text: List[str] = []
+
+    @staticmethod
+    def _collapse(text: str, stack) -> str:
+        # same as `bs4.BeautifulSoup.endData`
+        if text.strip("\x20\n\t\x0c\r") or any(
+            i in _PaperParser.PRESERVE_WHITESPACE_ELEMENTS for i in stack
+        ):
+            return text
+        return "\n" if "\n" in text else " "
+
+    def _end_text(self, markup: bool):
+        """Called before markup,
+        `markup` is whether it is kept in container html."""
+
+        if self._outer_text:
+            text = self._collapse("".join(self._outer_text), self._outer)
+            self._outer_text = []
+            if self.found:
+                self._inner_text.append(text)
+        if not markup or not self._inner_text:
+            return
+        text = self._collapse(
+            "".join(self._inner_text), (name for name, _ in self._inner)
+        )
+        self._inner_text = []
+        if self._no_text_depth:
+            return
+        for _, line in self._inner:
+            if line >= 0:
+                self.lines[line].append(text)
+
+    def _inner_start(self, tag: str):
+        line = -1
+        if tag == "p":
+            line = len(self.lines)
+            self.lines.append([])
+        elif tag in self.NO_TEXT_ELEMENTS:
+            self._no_text_depth += 1
+        self._inner.append((tag, line))
+
+    def _inner_end(self, tag: str):
+        for index in range(len(self._inner) - 1, -1, -1):
+            if self._inner[index][0] == tag:
+                break
+        else:
+            return
+        for name, _ in self._inner[index:]:
+            if name in self.NO_TEXT_ELEMENTS:
+                self._no_text_depth -= 1
+        del self._inner[index:]
+
+    def handle_starttag(self, tag, attrs, self_closing=False):
+        if self._done:
+            return
+        self._end_text(True)
+        if not self.found and dict(attrs).get("id") == self.container_id:
+            self.found = True
+            self._container_index = len(self._outer)
+        if tag in self.VOID_ELEMENTS:
+            if not self_closing:
+                self._closed_void.append(tag)
+            if self.found and tag == "br" and not attrs:
+                self._inner_end("p")
+                self._inner_start("p")
+            return
+        self._outer.append(tag)
+        if self.found:
+            self._inner_start(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, True)
+        if tag not in self.VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._done:
+            return
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        if tag not in self._outer:
+            self._end_text(False)
+            return
+        self._end_text(True)
+        index = len(self._outer) - 1 - self._outer[::-1].index(tag)
+        if self.found:
+            for i in reversed(self._outer[max(index, self._container_index) :]):
+                self._inner_end(i)
+            if index <= self._container_index:
+                self._done = True
+        del self._outer[index:]
+
+    def handle_data(self, data):
+        if not self._done:
+            self._outer_text.append(data)
+
+    def handle_comment(self, data):
+        if not self._done:
+            self._end_text(True)
+
+    handle_pi = handle_comment
+
+    def unknown_decl(self, data):
+        if not self._done:
+            self._end_text(True)
+            if data.upper().startswith("CDATA["):
+                # `bs4.CData` is text
+                self._outer_text.append(data[len("CDATA[") :])
+                self._end_text(True)
+
+    def handle_decl(self, decl):
+        if not self._done:
+            self._end_text(True)
+            if self.found:
+                # `bs4.Doctype` output ends with newline
+                self._inner_text.append("\n")
+
+    def close(self):
+        super().close()
+        if not self._done:
+            self._end_text(True)
+
+
+def extract_paper(html: str, url: str = "") -> str:
+    """Extract paper text from paper page html.
+
+    Args:
+        html (str): Paper page html.
+        url (str): Paper url for error message.
+
+    Returns:
+        str: Extracted paper text, one line per paragraph.
+    """
+
+    parser = _PaperParser("UCAP-CONTENT")
+    parser.feed(html)
+    parser.close()
+    assert parser.found, f"Can not get paper container from url: {url}"
+    ret = "\n".join("".join(i).strip() for i in parser.lines)
     assert ret, f"can not get paper content from url: {url}"
     return ret
 
 
+class RuleGrammar:
+    """Grammar of rule lines in paper, instance is created for each paper.
+
+    Subclass is added to `RULE_GRAMMARS` to support new paper format.
+    """
+
+    name = ""
+
+    def match(self, line: str) -> Optional[Tuple[str, str]]:
+        """Match paper line, called for every line in order.
+
+        Returns:
+            Optional[Tuple[str, str]]: (name, description) when line is a rule.
+        """
+
+        raise NotImplementedError
+
+
+class NormalRuleGrammar(RuleGrammar):
+    """Normal holiday rule for a year, e.g. `一、元旦：1月1日放假，共1天。`"""
+
+    name = "normal"
+    PATTERN = re.compile(r"[一二三四五六七八九十]、(.+?)：(.+)")
+
+    def match(self, line: str) -> Optional[Tuple[str, str]]:
+        match = self.PATTERN.match(line)
+        return match.groups() if match else None
+
+
+class PatchRuleGrammar(RuleGrammar):
+    """Holiday patch rule for existed holiday,
+    numbered lines with date after a title like `2020年春节假期延长安排`."""
+
+    name = "patch"
+    TITLE_PATTERN = re.compile(r".*\d+年([^和、]{2,})(?:假期|放假).*安排")
+    RULE_PATTERN = re.compile(r"^[一二三四五六七八九十]、(.+)$")
+    DATE_PATTERN = re.compile(r"\d+月\d+日")
+
+    def __init__(self):
+        self.holiday: Optional[str] = None
+
+    def match(self, line: str) -> Optional[Tuple[str, str]]:
+        match = self.TITLE_PATTERN.match(line)
+        if match:
+            self.holiday = match.group(1)
+        if not self.holiday:
+            return None
+        match = self.RULE_PATTERN.match(line)
+        if match and self.DATE_PATTERN.search(match.group(1)):
+            return self.holiday, match.group(1)
+        return None
+
+
+RULE_GRAMMARS: List[Type[RuleGrammar]] = [NormalRuleGrammar, PatchRuleGrammar]
+"""Rule grammars in output order, hits are counted as `rule_grammar_hits` metric."""
+
+
+def _scan_rules(
+    lines: Iterable[str], grammars: List[Type[RuleGrammar]]
+) -> List[List[Tuple[str, str]]]:
+    parsers = [i() for i in grammars]
+    ret = [[] for _ in grammars]
+    for line in lines:
+        for parser, rules in zip(parsers, ret):
+            rule = parser.match(line)
+            if rule:
+                rules.append(rule)
+    for grammar, rules in zip(grammars, ret):
+        if rules:
+            metrics.count("rule_grammar_hits", len(rules), grammar=grammar.name)
+    return ret
+
+
 def get_rules(paper: str) -> Iterator[Tuple[str, str]]:
     """Extract rules from paper.
 
+    Lines are matched by all `RULE_GRAMMARS` in one scan.
+
     Args:
         paper (str): Paper text
 
@@ -167,53 +762,37 @@ def get_rules(paper: str) -> Iterator[Tuple[str, str]]:
         Iterator[Tuple[str, str]]: (name, description)
     """
 
-    lines: list = paper.splitlines()
-    lines = sorted(set(lines), key=lines.index)
-    count = 0
-    for i in chain(get_normal_rules(lines), get_patch_rules(lines)):
-        count += 1
-        yield i
-    if not count:
+    lines = list(dict.fromkeys(paper.splitlines()))
+    ret = [j for i in _scan_rules(lines, RULE_GRAMMARS) for j in i]
+    if not ret:
         raise NotImplementedError(lines)
+    yield from ret
 
 
-def get_normal_rules(lines: Iterator[str]) -> Iterator[Tuple[str, str]]:
+def get_normal_rules(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
     """Get normal holiday rule for a year
 
     Args:
-        lines (Iterator[str]): paper content
+        lines (Iterable[str]): paper content
 
     Returns:
         Iterator[Tuple[str, str]]: (name, description)
     """
-    for i in lines:
-        match = re.match(r"[一二三四五六七八九十]、(.+?)：(.+)", i)
-        if match:
-            yield match.groups()
+
+    yield from _scan_rules(lines, [NormalRuleGrammar])[0]
 
 
-def get_patch_rules(lines: Iterator[str]) -> Iterator[Tuple[str, str]]:
+def get_patch_rules(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
     """Get holiday patch rule for existed holiday
 
     Args:
-        lines (Iterator[str]): paper content
+        lines (Iterable[str]): paper content
 
     Returns:
         Iterator[Tuple[str, str]]: (name, description)
     """
-    name = None
-    for i in lines:
-        match = re.match(r".*\d+年([^和、]{2,})(?:假期|放假).*安排", i)
-        if match:
-            name = match.group(1)
-        if not name:
-            continue
-        match = re.match(r"^[一二三四五六七八九十]、(.+)$", i)
-        if not match:
-            continue
-        description = match.group(1)
-        if re.match(r".*\d+月\d+日.*", description):
-            yield name, description
+
+    yield from _scan_rules(lines, [PatchRuleGrammar])[0]
 
 
 def _cast_int(value):
@@ -227,6 +806,7 @@ class DescriptionParser:
         self.description = description
         self.year = year
         self.date_history = list()
+        self._date_seen = set()
 
     def parse(self) -> Iterator[dict]:
         """Generator for description parsing result.
@@ -236,13 +816,30 @@ class DescriptionParser:
         """
 
         del self.date_history[:]
-        for i in re.split("[，。；]", self.description):
+        self._date_seen.clear()
+        for i in _SENTENCE_SEPARATOR_RE.split(self.description):
             for j in SentenceParser(self, i).parse():
                 yield j
 
         if not self.date_history:
             raise NotImplementedError(self.description)
 
+    def add_history(self, v: date) -> bool:
+        """Record extracted date.
+
+        Args:
+            v (date): Extracted date.
+
+        Returns:
+            bool: Whether date is first seen.
+        """
+
+        self.date_history.append(v)
+        if v in self._date_seen:
+            return False
+        self._date_seen.add(v)
+        return True
+
     def get_date(self, year: Optional[int], month: Optional[int], day: int) -> date:
         """Get date in context.
 
@@ -274,6 +871,50 @@ class DescriptionParser:
         return date(year=year, month=month, day=day)
 
 
+_DATE_PATTERN = r"(?:(\d+)年)?(?:(\d+)月)?(\d+)日"
+_DATE_RE = re.compile(_DATE_PATTERN)
+_NOTE_RE = re.compile(r"（.+?）")
+_DATE_TOKEN_RE = re.compile(r"(?P<date>%s)|(?P<sep>至|-|—|、)" % (_DATE_PATTERN,))
+_RANGE_SEPARATORS = {"至", "-", "—"}
+_SENTENCE_SEPARATOR_RE = re.compile("[，。；]")
+_REST_RE = re.compile(r"(.+)(放假|补休|调休|公休)+(?:\d+天)?$")
+_WORK_RE = re.compile("(.+)上班$")
+_SHIFT_RE = re.compile("(.+)调至(.+)")
+_GAP = None
+
+
+def _tokenize_dates(text: str) -> Tuple[list, list]:
+    """Scan date tokens from text.
+
+    Notes are removed before scanning structure, so text around a note is
+    joined, e.g. `3月（5月2日）10日` is `3月10日` in structure.
+
+    Returns:
+        Tuple[list, list]: (all dates, structure)
+            all dates are date groups in text order, include dates in notes.
+            structure is date groups and separators outside notes,
+            non-adjacent items are separated by `_GAP`.
+    """
+
+    dates = None
+    if "（" in text:
+        dates = [tuple(_cast_int(i) for i in j) for j in _DATE_RE.findall(text)]
+        text = _NOTE_RE.sub("", text)
+    structure = []
+    end = 0
+    for match in _DATE_TOKEN_RE.finditer(text):
+        if match.start() != end:
+            structure.append(_GAP)
+        end = match.end()
+        if match.lastgroup == "sep":
+            structure.append(match.group())
+            continue
+        structure.append(tuple(_cast_int(i) for i in match.group(2, 3, 4)))
+    if dates is None:
+        dates = [i for i in structure if isinstance(i, tuple)]
+    return dates, structure
+
+
 class SentenceParser:
     """Parser for holiday shift description sentence."""
 
@@ -284,6 +925,10 @@ class SentenceParser:
     def extract_dates(self, text: str) -> Iterator[date]:
         """Extract date from text.
 
+        Single dates, ranges (`至`, `-`, `—`) and lists (`、`) are
+        recognized from one scan, notes in brackets are ignored for
+        ranges and lists.
+
         Args:
             text (str): Text to extract
 
@@ -291,58 +936,62 @@ class SentenceParser:
             Iterator[date]: Extracted dates.
         """
 
-        count = 0
         text = text.replace("(", "（").replace(")", "）")
-        for i in chain(
-            *(method(self, text) for method in self.date_extraction_methods)
-        ):
-            count += 1
-            is_seen = i in self.parent.date_history
-            self.parent.date_history.append(i)
-            if is_seen:
-                continue
-            yield i
-
-        if not count:
+        dates, structure = _tokenize_dates(text)
+        if not dates:
             raise NotImplementedError(text)
 
-    def _extract_dates_1(self, value: str) -> Iterator[date]:
-        match = re.findall(r"(?:(\d+)年)?(?:(\d+)月)?(\d+)日", value)
-        for groups in match:
-            groups = [_cast_int(i) for i in groups]
-            assert len(groups) == 3, groups
-            yield self.parent.get_date(year=groups[0], month=groups[1], day=groups[2])
-
-    def _extract_dates_2(self, value: str) -> Iterator[date]:
-        value = re.sub(r"（.+?）", "", value)
-        match = re.findall(
-            r"(?:(\d+)年)?(?:(\d+)月)?(\d+)日(?:至|-|—)(?:(\d+)年)?(?:(\d+)月)?(\d+)日",
-            value,
-        )
-        for groups in match:
-            groups = [_cast_int(i) for i in groups]
-            assert len(groups) == 6, groups
-            start = self.parent.get_date(year=groups[0], month=groups[1], day=groups[2])
-            end = self.parent.get_date(year=groups[3], month=groups[4], day=groups[5])
-            for i in range((end - start).days + 1):
-                yield start + timedelta(days=i)
-
-    def _extract_dates_3(self, value: str) -> Iterator[date]:
-        value = re.sub(r"（.+?）", "", value)
-        match = re.findall(
-            r"(?:(\d+)年)?(?:(\d+)月)?(\d+)日(?:（[^）]+）)?"
-            r"(?:、(?:(\d+)年)?(?:(\d+)月)?(\d+)日(?:（[^）]+）)?)+",
-            value,
-        )
-        for groups in match:
-            groups = [_cast_int(i) for i in groups]
-            assert not (len(groups) % 3), groups
-            for i in range(0, len(groups), 3):
-                yield self.parent.get_date(
-                    year=groups[i], month=groups[i + 1], day=groups[i + 2]
-                )
+        get_date = self.parent.get_date
+        add_history = self.parent.add_history
 
-    date_extraction_methods = [_extract_dates_1, _extract_dates_2, _extract_dates_3]
+        for groups in dates:
+            i = get_date(*groups)
+            if add_history(i):
+                yield i
+
+        # ranges, first match wins when overlap
+        index = 0
+        while index + 2 < len(structure):
+            start, sep, end = structure[index : index + 3]
+            if (
+                isinstance(start, tuple)
+                and sep in _RANGE_SEPARATORS
+                and isinstance(end, tuple)
+            ):
+                start = get_date(*start)
+                end = get_date(*end)
+                for offset in range((end - start).days + 1):
+                    i = start + timedelta(days=offset)
+                    if add_history(i):
+                        yield i
+                index += 3
+            else:
+                index += 1
+
+        # lists, only first and last item re-evaluated, others are seen
+        index = 0
+        while index < len(structure):
+            last = index
+            while (
+                isinstance(structure[index], tuple)
+                and last + 2 < len(structure)
+                and structure[last + 1] == "、"
+                and isinstance(structure[last + 2], tuple)
+            ):
+                last += 2
+            if last == index:
+                index += 1
+                continue
+            # same as repeated regex group, year and month of last item
+            # falls back to previous items when omitted.
+            tail = [None, None, None]
+            for groups in structure[index + 2 : last + 1 : 2]:
+                tail = [j if j is not None else tail[k] for k, j in enumerate(groups)]
+            for groups in (structure[index], tail):
+                i = get_date(*groups)
+                if add_history(i):
+                    yield i
+            index = last + 1
 
     def parse(self) -> Iterator[dict]:
         """Parse days with memory
@@ -360,19 +1009,19 @@ class SentenceParser:
     def _parse_rest_1(self):
         if self.sentence.startswith("不"):
             return
-        match = re.match(r"(.+)(放假|补休|调休|公休)+(?:\d+天)?$", self.sentence)
+        match = _REST_RE.match(self.sentence)
         if match:
             for i in self.extract_dates(match.group(1)):
                 yield {"date": i, "isOffDay": True}
 
     def _parse_work_1(self):
-        match = re.match("(.+)上班$", self.sentence)
+        match = _WORK_RE.match(self.sentence)
         if match:
             for i in self.extract_dates(match.group(1)):
                 yield {"date": i, "isOffDay": False}
 
     def _parse_shift_1(self):
-        match = re.match("(.+)调至(.+)", self.sentence)
+        match = _SHIFT_RE.match(self.sentence)
         if match:
             for i in self.extract_dates(match.group(1)):
                 yield {"date": i, "isOffDay": False}
@@ -386,61 +1035,252 @@ class SentenceParser:
     ]
 
 
-def parse_paper(year: int, url: str) -> Iterator[dict]:
+def parse_paper(
+    year: int, url: str, client: Optional[FetchClient] = None
+) -> Iterator[Day]:
     """Parse one paper
 
     Args:
         year (int): Year
         url (str): Paper url
+        client (Optional[FetchClient]): Defaults to `get_default_client()`.
 
     Returns:
-        Iterator[dict]: Days
+        Iterator[Day]: Days
     """
     if url in PRE_PARSED_PAPERS:
         yield from PRE_PARSED_PAPERS[url]
         return
-    paper = get_paper(url)
-    rules = get_rules(paper)
-    ret = (
-        {"name": name, **i}
-        for name, description in rules
-        for i in DescriptionParser(description, year).parse()
-    )
+    client = client or get_default_client()
+    paper = get_paper(url, client)
+    with metrics.timer("paper_parse_seconds", year=year):
+        ret = parse_paper_text(year, paper, url)
+    yield from ret
+    # published paper never changes
+    client.pin(url)
+
+
+def parse_paper_text(year: int, paper: str, url: str = "") -> List[Day]:
+    """Parse extracted paper text.
+
+    Args:
+        year (int): Year
+        paper (str): Paper text from `extract_paper`.
+        url (str): Paper url for error message.
+
+    Raises:
+        RuntimeError: When paper has unsupported description.
+
+    Returns:
+        List[Day]: Days in paper order.
+    """
+
     try:
-        for i in ret:
-            yield i
+        return [
+            Day(sys.intern(name), i["date"], i["isOffDay"])
+            for name, description in get_rules(paper)
+            for i in DescriptionParser(description, year).parse()
+        ]
     except NotImplementedError as ex:
         raise RuntimeError("Can not parse paper", url) from ex
 
 
-def fetch_holiday(year: int):
-    """Fetch holiday data."""
+def merge_days(parsed: Iterable[Iterable[Day]]) -> List[Day]:
+    """Merge days of papers, later paper wins.
 
-    papers = get_paper_urls(year)
+    Args:
+        parsed (Iterable[Iterable[Day]]): Days of each paper, sort by publish time.
+
+    Returns:
+        List[Day]: Days sort by date.
+    """
 
     days = dict()
+    for k in (j for i in parsed for j in i):
+        days[k.date] = k
+    return [days[i] for i in sorted(days)]
+
+
+def fetch_holiday(
+    year: int,
+    client: Optional[FetchClient] = None,
+    executor: Optional[Executor] = None,
+    papers: Optional[List[str]] = None,
+):
+    """Fetch holiday data.
 
-    for k in (j for i in papers for j in parse_paper(year, i)):
-        days[k["date"]] = k
+    Args:
+        year (int): Year
+        client (Optional[FetchClient]): Defaults to `get_default_client()`.
+        executor (Optional[Executor]): Fetch search pages and papers
+            concurrently with executor, result is same as serial fetch.
+        papers (Optional[List[str]]): Paper urls from `get_paper_urls_batch`,
+            search when not given.
+    """
+
+    if papers is None:
+        with metrics.timer("search_seconds", year=year):
+            papers = get_paper_urls(year, client, executor)
 
+    def _parse(url):
+        return list(parse_paper(year, url, client))
+
+    parsed = executor.map(_parse, papers) if executor else map(_parse, papers)
     return {
         "year": year,
         "papers": papers,
-        "days": sorted(days.values(), key=lambda x: x["date"]),
+        "days": merge_days(parsed),
     }
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("year", type=int)
-    args = parser.parse_args()
-    year = args.year
+async def get_paper_urls_batch_async(
+    years: Iterable[int], client: AsyncFetchClient
+) -> Dict[int, List[str]]:
+    """Async version of `get_paper_urls_batch`."""
 
-    print(
-        json.dumps(
-            fetch_holiday(year), indent=4, ensure_ascii=False, cls=CustomJSONEncoder
+    years = sorted(set(years))
+    query = _search_query(years)
+
+    async def _page(page_index):
+        body = await client.get(
+            client.search_url,
+            _search_params(query, page_index, client.search_page_size),
         )
+        return _search_result(years, json.loads(body), client.search_url)
+
+    matched, total_page, done = await _page(0)
+    page_index = 1
+    while not done and page_index < total_page:
+        pages = range(page_index, min(page_index + SEARCH_PREFETCH_PAGES, total_page))
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_page(i)) for i in pages]
+        for i in tasks:
+            page_matched, _, done = i.result()
+            matched += page_matched
+            if done:
+                break
+        page_index = pages.stop
+    return _select_paper_urls(years, matched)
+
+
+async def get_paper_urls_async(year: int, client: AsyncFetchClient) -> List[str]:
+    """Async version of `get_paper_urls`."""
+
+    return (await get_paper_urls_batch_async([year], client))[year]
+
+
+async def parse_paper_async(year: int, url: str, client: AsyncFetchClient) -> List[Day]:
+    """Async version of `parse_paper`."""
+
+    if url in PRE_PARSED_PAPERS:
+        return list(PRE_PARSED_PAPERS[url])
+    body = await client.get(url)
+    metrics.count("papers_downloaded")
+    paper = extract_paper(body.decode("utf-8", errors="replace"), url)
+    with metrics.timer("paper_parse_seconds", year=year):
+        ret = parse_paper_text(year, paper, url)
+    # published paper never changes
+    client.pin(url)
+    return ret
+
+
+async def fetch_holiday_async(
+    years: Iterable[int],
+    client: Optional[AsyncFetchClient] = None,
+    batch_search: bool = False,
+) -> List[dict]:
+    """Fetch holiday data of years concurrently, requires `aiohttp`.
+
+    Searches and papers of all years are requested concurrently,
+    first error cancels all pending requests.
+
+    Args:
+        years (Iterable[int]): Years.
+        client (Optional[AsyncFetchClient]): Defaults to a new client
+            that closed on return.
+        batch_search (bool): Find papers of all years with one search query
+            like `get_paper_urls_batch`, instead of one query for each year.
+
+    Raises:
+        ExceptionGroup: Errors of failed requests.
+
+    Returns:
+        List[dict]: Same as `fetch_holiday` of each year, in given order.
+    """
+
+    years = list(years)
+    if client is None:
+        async with AsyncFetchClient() as client:
+            return await fetch_holiday_async(years, client, batch_search)
+    with metrics.timer("search_seconds", year=",".join(str(i) for i in years)):
+        if batch_search:
+            papers = await get_paper_urls_batch_async(years, client)
+        else:
+            async with asyncio.TaskGroup() as group:
+                search = {
+                    year: group.create_task(get_paper_urls_async(year, client))
+                    for year in set(years)
+                }
+            papers = {k: v.result() for k, v in search.items()}
+    async with asyncio.TaskGroup() as group:
+        tasks = {
+            year: [
+                group.create_task(parse_paper_async(year, url, client))
+                for url in papers[year]
+            ]
+            for year in set(years)
+        }
+    return [
+        {
+            "year": year,
+            "papers": papers[year],
+            "days": merge_days(i.result() for i in tasks[year]),
+        }
+        for year in years
+    ]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("year", type=int)
+    parser.add_argument(
+        "--timeout", type=float, default=30, help="request timeout in seconds"
     )
+    parser.add_argument("--retries", type=int, default=3, help="max retry count")
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=SEARCH_PAGE_SIZE,
+        help="results per search page, default is %(default)s",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="do not use on-disk http cache"
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--record", metavar="ARCHIVE", help="record responses to zip archive"
+    )
+    group.add_argument(
+        "--replay", metavar="ARCHIVE", help="replay responses from zip archive"
+    )
+    args = parser.parse_args(argv)
+    year = args.year
+
+    with FetchClient(
+        timeout=args.timeout,
+        retries=args.retries,
+        search_page_size=args.page_size,
+        cache=None if args.no_cache or args.record or args.replay else HTTPCache(),
+    ) as client:
+        from replay import Archive, record, replay
+
+        if args.record:
+            record(client.session, Archive(args.record))
+        if args.replay:
+            replay(client.session, Archive(args.replay))
+        data = fetch_holiday(year, client)
+    data["days"] = dump_days(data["days"])
+    print(json.dumps(data, indent=4, ensure_ascii=False, cls=CustomJSONEncoder))
 
 
 class CustomJSONEncoder(json.JSONEncoder):
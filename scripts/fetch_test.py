@@ -1,42 +1,62 @@
 """Test module `fetch_holidays`."""
 
+import asyncio
 import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
 import pytest
+import requests
 
+import fetch
+import metrics
 from fetch import (
+    AsyncFetchClient,
     CustomJSONEncoder,
     DescriptionParser,
+    FetchClient,
+    extract_paper,
+    fetch_holiday,
+    fetch_holiday_async,
     get_paper,
     get_paper_urls,
+    get_paper_urls_batch,
+    get_paper_urls_batch_async,
     get_rules,
 )
 
+from benchmark import load_papers
 from filetools import workspace_path
+from httpcache import HTTPCache
 
 
-def test_get_paper_urls():
-    assert get_paper_urls(2019) == [
+def test_get_paper_urls(client):
+    assert get_paper_urls(2019, client) == [
         "https://www.gov.cn/zhengce/zhengceku/2018-12/06/content_5346276.htm",
         "https://www.gov.cn/zhengce/zhengceku/2019-03/22/content_5375877.htm",
     ]
 
 
-def test_get_rules():
+def test_get_rules(client):
     assert list(
         get_rules(
             get_paper(
-                "http://www.gov.cn/zhengce/zhengceku/2019-03/22/content_5375877.htm"
+                "http://www.gov.cn/zhengce/zhengceku/2019-03/22/content_5375877.htm",
+                client,
             )
         )
     ) == [("劳动节", "2019年5月1日至4日放假调休，共4天。4月28日（星期日）、5月5日（星期日）上班。")]
 
 
-def test_get_rules_2023():
+def test_get_rules_2023(client):
     got = list(
         get_rules(
             get_paper(
-                "http://www.gov.cn/zhengce/zhengceku/2022-12/08/content_5730844.htm"
+                "http://www.gov.cn/zhengce/zhengceku/2022-12/08/content_5730844.htm",
+                client,
             )
         )
     )
@@ -59,6 +79,74 @@ def test_get_rules_2023():
     ]
 
 
+def test_get_rules_grammars(monkeypatch):
+    class _ExtraGrammar(fetch.RuleGrammar):
+        name = "extra"
+
+        def match(self, line):
+            match = re.match(r"附：(.+?)调整为(.+)", line)
+            return match.groups() if match else None
+
+    monkeypatch.setattr(fetch, "RULE_GRAMMARS", [*fetch.RULE_GRAMMARS, _ExtraGrammar])
+    recorder = metrics.Recorder()
+    previous = metrics.set_recorder(recorder)
+    try:
+        got = list(
+            get_rules(
+                "附：清明节调整为4月4日放假。\n"
+                "一、元旦：1月1日放假，共1天。\n"
+                "一、元旦：1月1日放假，共1天。\n"
+                "关于2020年春节假期延长安排的通知\n"
+                "一、延长2020年春节假期至2月2日（农历正月初九，星期日）。\n"
+                "二、元旦：1月2日上班。"
+            )
+        )
+    finally:
+        metrics.set_recorder(previous)
+    assert got == [
+        ("元旦", "1月1日放假，共1天。"),
+        ("元旦", "1月2日上班。"),
+        ("春节", "延长2020年春节假期至2月2日（农历正月初九，星期日）。"),
+        ("春节", "元旦：1月2日上班。"),
+        ("清明节", "4月4日放假。"),
+    ]
+    assert {k: v for (_, k), v in recorder.counters.items()} == {
+        (("grammar", "normal"),): 2,
+        (("grammar", "patch"),): 2,
+        (("grammar", "extra"),): 1,
+    }
+
+
+def _extract_paper_bs4(html):
+    bs4 = pytest.importorskip("bs4")
+    container = bs4.BeautifulSoup(html, features="html.parser").find(id="UCAP-CONTENT")
+    p = bs4.BeautifulSoup(
+        container.decode().replace("<br/>", "</p><p>"), features="html.parser"
+    ).find_all("p")
+    return "\n".join(i.get_text().strip() for i in p)
+
+
+_EXTRACT_PAPER_CASES = [
+    *(i["html"] for i in load_papers()),
+    '<div id="UCAP-CONTENT"><p>a<br>b<br/>c<br class="x">d</p></div>',
+    '<div id="UCAP-CONTENT"><p>a<p>b</p>c</p><p>d</div><p>e</p>',
+    '<div id="UCAP-CONTENT"><p>a<script>x<br/>y</script><style>s</style>'
+    "<!-- c -->b<template><p>t</p></template></p></div>",
+    '<section><div id="UCAP-CONTENT"><p>a<b>b</section><p>c</p>',
+    '<div id="UCAP-CONTENT"><p>&lt;a&gt;&amp;&nbsp;b <span> </span>\n'
+    "<span>\n\t</span>c</p><pre><p> </p></pre></div>",
+    '<div id="UCAP-CONTENT"><p>a</br> <br>\n</br> <!DOCTYPE html>b'
+    "<![CDATA[c]]></p></div>",
+]
+
+
+@pytest.mark.parametrize(
+    "html", _EXTRACT_PAPER_CASES, ids=[str(i) for i in range(len(_EXTRACT_PAPER_CASES))]
+)
+def test_extract_paper_same_as_bs4(html):
+    assert extract_paper(html) == _extract_paper_bs4(html)
+
+
 def _normalize(iterable):
     return sorted(
         json.loads(json.dumps(list(iterable), cls=CustomJSONEncoder)),
@@ -81,3 +169,341 @@ def test_parse_description(case):
     assert _normalize(DescriptionParser(description, year).parse()) == _normalize(
         expected
     ), case
+
+
+def test_parse_description_note_between_month_and_day():
+    # notes are removed before joining ranges and lists,
+    # so `3月（5月2日）10日` is `3月10日` there,
+    # while dates in notes are still extracted.
+    got = [
+        i["date"]
+        for i in DescriptionParser(
+            "3月12月31日3月（5月2日）10日-1日月共3天(星期六)12月调休", 2023
+        ).parse()
+    ]
+    assert got == [
+        date(2023, 12, 31),
+        date(2023, 5, 2),
+        date(2023, 5, 10),
+        date(2023, 5, 1),
+        *(date(2023, 3, 10) + timedelta(days=i) for i in range(52)),
+    ]
+
+
+def _search_response(*items, totalpage=1):
+    return json.dumps(
+        {
+            "code": 200,
+            "msg": "",
+            "searchVO": {
+                "listVO": [dict(zip(("title", "url", "pubtimeStr"), i)) for i in items],
+                "totalpage": totalpage,
+            },
+        },
+        ensure_ascii=False,
+    )
+
+
+def test_fetch_client_retry(stub_server):
+    stub_server.add("/paper", "unavailable", status=503)
+    stub_server.add("/paper", "unavailable", status=502)
+    stub_server.add("/paper", "ok")
+    with FetchClient(backoff_factor=0) as client:
+        assert client.get(stub_server.url("/paper")).text == "ok"
+    assert len(stub_server.requests) == 3
+    assert len(set(i["port"] for i in stub_server.requests)) == 1, "keep alive"
+
+
+def test_fetch_client_retry_exhausted(stub_server):
+    stub_server.add("/paper", "unavailable", status=500)
+    with FetchClient(retries=1, backoff_factor=0) as client:
+        with pytest.raises(requests.HTTPError):
+            client.get(stub_server.url("/paper"))
+    assert len(stub_server.requests) == 2
+
+
+def test_fetch_client_connection_error():
+    with FetchClient(retries=1, backoff_factor=0, timeout=1) as client:
+        with pytest.raises(requests.ConnectionError):
+            client.get("http://127.0.0.1:1/")
+
+
+def test_get_paper_urls_stub(stub_server):
+    pages = [
+        _search_response(
+            ("国务院办公厅关于2019年劳动节假期调整安排的通知", "/b"),
+            ("国务院办公厅关于2018年部分节假日安排的通知", "/x"),
+            totalpage=2,
+        ),
+        _search_response(
+            ("国务院办公厅关于2019年部分节假日安排的通知", "/a"), totalpage=2
+        ),
+    ]
+    stub_server.route(
+        "/search",
+        lambda query, _: (200, {}, pages[int(query["p"])].encode("utf-8")),
+    )
+    with FetchClient(search_url=stub_server.url("/search")) as client:
+        assert get_paper_urls(2019, client) == ["/a", "/b"]
+    assert [i["query"]["p"] for i in stub_server.requests] == ["0", "1"]
+    assert stub_server.requests[0]["query"]["q"] == "假期 2019"
+
+
+def _batch_search_pages():
+    return [
+        _search_response(
+            ("国务院办公厅关于2020年部分节假日安排的通知", "/2020", "2019.11.21"),
+            totalpage=6,
+        ),
+        _search_response(
+            ("国务院办公厅关于2019年劳动节假期调整安排的通知", "/b", "2019.03.22"),
+            totalpage=6,
+        ),
+        _search_response(
+            ("国务院办公厅关于2019年部分节假日安排的通知", "/a", "2018.12.06"),
+            ("国务院办公厅关于2018年部分节假日安排的通知", "/2018", "2017.11.30"),
+            totalpage=6,
+        ),
+        _search_response(
+            ("国务院办公厅关于2017年部分节假日安排的通知", "/2017", "2016.12.01"),
+            totalpage=6,
+        ),
+        _search_response(
+            ("国务院办公厅关于2016年部分节假日安排的通知", "/2016", "2015.12.10"),
+            totalpage=6,
+        ),
+        _search_response(totalpage=6),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [0, 4])
+def test_get_paper_urls_batch(stub_server, jobs):
+    pages = _batch_search_pages()
+    stub_server.route(
+        "/search",
+        lambda query, _: (200, {}, pages[int(query["p"])].encode("utf-8")),
+    )
+    with FetchClient(
+        search_url=stub_server.url("/search"), search_page_size=30
+    ) as client:
+        if jobs:
+            with ThreadPoolExecutor(jobs) as executor:
+                got = get_paper_urls_batch([2020, 2019], client, executor)
+        else:
+            got = get_paper_urls_batch([2020, 2019], client)
+    assert got == {2019: ["/a", "/b"], 2020: ["/2020"]}
+    query = [i["query"] for i in stub_server.requests]
+    assert {i["q"] for i in query} == {"假期"}
+    assert {i["n"] for i in query} == {"30"}
+    # early exit after results older than 2018
+    assert sorted(i["p"] for i in query) == (
+        ["0", "1", "2", "3", "4"] if jobs else ["0", "1", "2"]
+    )
+
+
+def test_get_paper_urls_batch_async(stub_server):
+    pytest.importorskip("aiohttp")
+    pages = _batch_search_pages()
+    stub_server.route(
+        "/search",
+        lambda query, _: (200, {}, pages[int(query["p"])].encode("utf-8")),
+    )
+
+    async def _fetch():
+        async with AsyncFetchClient(search_url=stub_server.url("/search")) as client:
+            return await get_paper_urls_batch_async([2020, 2019], client)
+
+    assert asyncio.run(_fetch()) == {2019: ["/a", "/b"], 2020: ["/2020"]}
+    assert sorted(i["query"]["p"] for i in stub_server.requests) == [
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+
+
+def test_get_paper_stub(stub_server):
+    stub_server.add(
+        "/paper",
+        '<html><body><div id="UCAP-CONTENT">'
+        "<p>一、劳动节：5月1日至4日放假调休，共4天。</p>"
+        "<p> 4月28日（星期日）上班。<br/>二、其他</p>"
+        "</div></body></html>",
+        headers={"Content-Type": "text/html"},
+    )
+    with FetchClient() as client:
+        assert get_paper(stub_server.url("/paper"), client) == (
+            "一、劳动节：5月1日至4日放假调休，共4天。\n4月28日（星期日）上班。\n二、其他"
+        )
+
+
+def _paper_html(*lines):
+    return (
+        '<html><body><div id="UCAP-CONTENT">'
+        + "".join("<p>%s</p>" % i for i in lines)
+        + "</div></body></html>"
+    )
+
+
+def _add_2019_papers(stub_server):
+    stub_server.add(
+        "/search",
+        _search_response(
+            ("国务院办公厅关于2019年部分节假日安排的通知", stub_server.url("/a")),
+            ("国务院办公厅关于2019年劳动节假期调整安排的通知", stub_server.url("/b")),
+        ),
+    )
+    stub_server.add(
+        "/a",
+        _paper_html(
+            "一、元旦：2018年12月30日至2019年1月1日放假调休，共3天。2018年12月29日（星期六）上班。",
+            "四、劳动节：5月1日放假。",
+        ),
+    )
+    stub_server.add(
+        "/b",
+        _paper_html(
+            "一、劳动节：2019年5月1日至4日放假调休，共4天。4月28日（星期日）、5月5日（星期日）上班。"
+        ),
+    )
+
+
+def test_fetch_holiday_executor(stub_server):
+    _add_2019_papers(stub_server)
+    with FetchClient(search_url=stub_server.url("/search")) as client:
+        serial = fetch_holiday(2019, client)
+        with ThreadPoolExecutor(4) as executor:
+            concurrent = fetch_holiday(2019, client, executor)
+    assert serial == concurrent
+    assert serial["papers"] == [stub_server.url("/a"), stub_server.url("/b")]
+    assert [(i.date.isoformat(), i.is_off_day) for i in serial["days"]] == [
+        ("2018-12-29", False),
+        ("2018-12-30", True),
+        ("2018-12-31", True),
+        ("2019-01-01", True),
+        ("2019-04-28", False),
+        ("2019-05-01", True),
+        ("2019-05-02", True),
+        ("2019-05-03", True),
+        ("2019-05-04", True),
+        ("2019-05-05", False),
+    ]
+    assert {i.name for i in serial["days"] if i.date.month == 5} == {"劳动节"}
+
+
+def test_fetch_holiday_async(stub_server, tmp_path):
+    pytest.importorskip("aiohttp")
+    _add_2019_papers(stub_server)
+    cache = HTTPCache(str(tmp_path))
+
+    async def _fetch():
+        async with AsyncFetchClient(
+            search_url=stub_server.url("/search"), cache=cache
+        ) as client:
+            return await fetch_holiday_async([2019], client)
+
+    (got,) = asyncio.run(_fetch())
+    with FetchClient(search_url=stub_server.url("/search")) as client:
+        assert got == fetch_holiday(2019, client)
+    request_count = len(stub_server.requests)
+    with FetchClient(search_url=stub_server.url("/search"), cache=cache) as client:
+        assert fetch_holiday(2019, client) == got
+    assert [i["path"] for i in stub_server.requests[request_count:]] == [
+        "/search"
+    ], "papers pinned by async client are used by sync client"
+
+
+def test_async_fetch_client_per_host(stub_server):
+    pytest.importorskip("aiohttp")
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def _handler(*_):
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return 200, {}, b"ok"
+
+    stub_server.route("/paper", _handler)
+
+    async def _fetch():
+        async with AsyncFetchClient(per_host=2) as client:
+            return await asyncio.gather(
+                *(client.get(stub_server.url("/paper")) for _ in range(6))
+            )
+
+    assert asyncio.run(_fetch()) == [b"ok"] * 6
+    assert active[1] == 2
+
+
+def test_async_fetch_client_retry(stub_server):
+    aiohttp = pytest.importorskip("aiohttp")
+    stub_server.add("/paper", "unavailable", status=503)
+    stub_server.add("/paper", "ok")
+    stub_server.add("/missing", "not found", status=404)
+
+    async def _fetch():
+        async with AsyncFetchClient(backoff_factor=0) as client:
+            assert await client.get(stub_server.url("/paper")) == b"ok"
+            with pytest.raises(aiohttp.ClientResponseError) as ex:
+                await client.get(stub_server.url("/missing"))
+            assert ex.value.status == 404
+
+    asyncio.run(_fetch())
+    assert [i["path"] for i in stub_server.requests] == ["/paper", "/paper", "/missing"]
+
+
+def test_fetch_holiday_async_cancel(stub_server):
+    aiohttp = pytest.importorskip("aiohttp")
+    stub_server.add(
+        "/search",
+        _search_response(
+            ("国务院办公厅关于2019年部分节假日安排的通知", stub_server.url("/a")),
+            ("国务院办公厅关于2019年劳动节假期调整安排的通知", stub_server.url("/b")),
+        ),
+    )
+    stub_server.add("/a", "not found", status=404)
+    stub_server.route("/b", lambda *_: time.sleep(5) or (200, {}, b""))
+
+    async def _fetch():
+        async with AsyncFetchClient(
+            search_url=stub_server.url("/search"), retries=0
+        ) as client:
+            return await fetch_holiday_async([2019], client)
+
+    start = time.perf_counter()
+    with pytest.raises(ExceptionGroup) as ex:
+        asyncio.run(_fetch())
+    assert time.perf_counter() - start < 4, "slow request cancelled"
+    assert ex.group_contains(aiohttp.ClientResponseError)
+
+
+def test_fetch_holiday_async_search_each_year(stub_server):
+    pytest.importorskip("aiohttp")
+    pages = {
+        "假期 2019": _search_response(
+            ("国务院办公厅关于2019年部分节假日安排的通知", stub_server.url("/a"))
+        ),
+        "假期 2030": _search_response(),
+    }
+    stub_server.route(
+        "/search", lambda query, _: (200, {}, pages[query["q"]].encode("utf-8"))
+    )
+    stub_server.add("/a", _paper_html("一、劳动节：5月1日放假。"))
+
+    async def _fetch():
+        async with AsyncFetchClient(search_url=stub_server.url("/search")) as client:
+            return await fetch_holiday_async([2019, 2030], client)
+
+    got = asyncio.run(_fetch())
+    assert [(i["year"], i["papers"]) for i in got] == [
+        (2019, [stub_server.url("/a")]),
+        (2030, []),
+    ]
+    assert sorted(
+        i["query"]["q"] for i in stub_server.requests if i["path"] == "/search"
+    ) == ["假期 2019", "假期 2030"]
@@ -1,9 +1,16 @@
 import datetime
-from typing import Any, Iterator, Sequence, Text, Tuple
-from icalendar import Event, Calendar, Timezone, TimezoneStandard
+from operator import attrgetter
+from typing import BinaryIO, Iterator, Sequence, Text, Tuple
+
+from day import Day
+
+CALENDAR_NAME = "中国法定节假日"
+CALENDAR_DESCRIPTION = "中国法定节假日数据，自动每日抓取国务院公告。"
 
 
 def _create_timezone():
+    from icalendar import Timezone, TimezoneStandard
+
     tz = Timezone()
     tz.add("TZID", "Asia/Shanghai")
 
@@ -17,6 +24,8 @@ def _create_timezone():
 
 
 def _create_event(event_name, start, end):
+    from icalendar import Event
+
     # 创建事件/日程
     event = Event()
     event.add("SUMMARY", event_name)
@@ -32,15 +41,7 @@ def _create_event(event_name, start, end):
     return event
 
 
-def _cast_date(v: Any) -> datetime.date:
-    if isinstance(v, datetime.date):
-        return v
-    if isinstance(v, str):
-        return datetime.date.fromisoformat(v)
-    raise NotImplementedError("can not convert to date: %s" % v)
-
-
-def _iter_date_ranges(days: Sequence[dict]) -> Iterator[Tuple[dict, dict]]:
+def _iter_date_ranges(days: Sequence[Day]) -> Iterator[Tuple[Day, Day]]:
     if len(days) == 0:
         return
 
@@ -50,9 +51,7 @@ def _iter_date_ranges(days: Sequence[dict]) -> Iterator[Tuple[dict, dict]]:
 
     fr, to = days[0], days[0]
     for cur in days[1:]:
-        if (_cast_date(cur["date"]) - _cast_date(to["date"])).days == 1 and cur[
-            "isOffDay"
-        ] == to["isOffDay"]:
+        if (cur.date - to.date).days == 1 and cur.is_off_day == to.is_off_day:
             to = cur
         else:
             yield fr, to
@@ -60,27 +59,116 @@ def _iter_date_ranges(days: Sequence[dict]) -> Iterator[Tuple[dict, dict]]:
     yield fr, to
 
 
-def generate_ics(days: Sequence[dict], filename: Text) -> None:
-    """Generate ics from days."""
+def _iter_events(
+    days: Sequence[Day],
+) -> Iterator[Tuple[str, datetime.date, datetime.date]]:
+    days = sorted(days, key=attrgetter("date"))
+
+    for fr, to in _iter_date_ranges(days):
+        start = fr.date
+        end = to.date + datetime.timedelta(days=1)
+
+        name = fr.name + "假期"
+        if not fr.is_off_day:
+            name = "上班(补" + name + ")"
+        yield name, start, end
+
+
+def _generate_ics_icalendar(days: Sequence[Day], f: BinaryIO) -> None:
+    from icalendar import Calendar
+
     cal = Calendar()
-    cal.add("X-WR-CALNAME", "中国法定节假日")
-    cal.add("X-WR-CALDESC", "中国法定节假日数据，自动每日抓取国务院公告。")
+    cal.add("X-WR-CALNAME", CALENDAR_NAME)
+    cal.add("X-WR-CALDESC", CALENDAR_DESCRIPTION)
     cal.add("VERSION", "2.0")
     cal.add("METHOD", "PUBLISH")
     cal.add("CLASS", "PUBLIC")
 
     cal.add_component(_create_timezone())
 
-    days = sorted(days, key=lambda x: x["date"])
-
-    for fr, to in _iter_date_ranges(days):
-        start = _cast_date(fr["date"])
-        end = _cast_date(to["date"]) + datetime.timedelta(days=1)
-
-        name = fr["name"] + "假期"
-        if not fr["isOffDay"]:
-            name = "上班(补" + name + ")"
+    for name, start, end in _iter_events(days):
         cal.add_component(_create_event(name, start, end))
 
+    f.write(cal.to_ical())
+
+
+def _escape_text(value: str) -> str:
+    # RFC 5545 3.3.11, same as icalendar
+    return (
+        value.replace(r"\N", "\n")
+        .replace("\\", "\\\\")
+        .replace(";", r"\;")
+        .replace(",", r"\,")
+        .replace("\r\n", r"\n")
+        .replace("\n", r"\n")
+    )
+
+
+def _fold_line(line: str, limit=75) -> str:
+    # RFC 5545 3.1, fold without splitting multi-byte characters,
+    # same as icalendar.
+    if line.isascii():
+        return "\r\n ".join(
+            line[i : i + limit - 1] for i in range(0, len(line), limit - 1)
+        )
+    ret = []
+    byte_count = 0
+    for char in line:
+        char_byte_len = len(char.encode("utf-8"))
+        byte_count += char_byte_len
+        if byte_count >= limit:
+            ret.append("\r\n ")
+            byte_count = char_byte_len
+        ret.append(char)
+    return "".join(ret)
+
+
+def _iter_stream_lines(days: Sequence[Day]) -> Iterator[str]:
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield "METHOD:PUBLISH"
+    yield "X-WR-CALDESC:" + _escape_text(CALENDAR_DESCRIPTION)
+    yield "X-WR-CALNAME:" + _escape_text(CALENDAR_NAME)
+    yield "CLASS:PUBLIC"
+    yield "BEGIN:VTIMEZONE"
+    yield "TZID:Asia/Shanghai"
+    yield "BEGIN:STANDARD"
+    yield "DTSTART:19700101T000000"
+    yield "TZOFFSETFROM:+0800"
+    yield "TZOFFSETTO:+0800"
+    yield "END:STANDARD"
+    yield "END:VTIMEZONE"
+    for name, start, end in _iter_events(days):
+        yield "BEGIN:VEVENT"
+        yield "SUMMARY:" + _escape_text(name)
+        yield "DTSTART;VALUE=DATE:" + start.strftime("%Y%m%d")
+        yield "DTEND;VALUE=DATE:" + end.strftime("%Y%m%d")
+        yield "DTSTAMP;VALUE=DATE:" + start.strftime("%Y%m%d")
+        yield f"UID:{start}/{end}/NateScarlet/holiday-cn"
+        yield "END:VEVENT"
+    yield "END:VCALENDAR"
+
+
+def write_ics(days: Sequence[Day], f: BinaryIO) -> None:
+    """Write ics to file object line by line, without icalendar."""
+
+    for line in _iter_stream_lines(days):
+        f.write((_fold_line(line) + "\r\n").encode("utf-8"))
+
+
+ENGINES = {
+    "stream": write_ics,
+    "icalendar": _generate_ics_icalendar,
+}
+
+
+def generate_ics(days: Sequence[Day], filename: Text, engine="stream") -> None:
+    """Generate ics from days.
+
+    Args:
+        days (Sequence[Day]): Days.
+        filename (Text): Output filename.
+        engine (str): Key of `ENGINES`, output is same for all engines.
+    """
     with open(filename, "wb") as f:
-        f.write(cal.to_ical())
+        ENGINES[engine](days, f)
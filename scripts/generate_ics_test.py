@@ -0,0 +1,57 @@
+"""Test module `generate_ics`."""
+
+import io
+import json
+import os
+import re
+from datetime import date
+
+import pytest
+
+from day import Day, load_days
+from filetools import workspace_path
+from generate_ics import ENGINES, _fold_line
+
+
+def _load_days(year):
+    with open(workspace_path(f"{year}.json"), "r", encoding="utf-8") as f:
+        return load_days(json.load(f)["days"])
+
+
+def _years():
+    return sorted(
+        int(i[:-5]) for i in os.listdir(workspace_path()) if re.match(r"\d+\.json$", i)
+    )
+
+
+def _generate(engine, days):
+    f = io.BytesIO()
+    ENGINES[engine](days, f)
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("year", _years())
+def test_engines_identical(year):
+    days = _load_days(year)
+    assert _generate("stream", days) == _generate("icalendar", days)
+
+
+def test_engines_identical_all_years():
+    days = [j for i in _years() for j in _load_days(i)]
+    assert _generate("stream", days) == _generate("icalendar", days)
+
+
+def test_engines_escape():
+    days = [
+        Day("a,b;c\\d\ne", date(2024, 1, 1), True),
+        Day("长" * 40, date(2024, 1, 2), False),
+        Day("x" * 100, date(2024, 1, 3), False),
+    ]
+    assert _generate("stream", days) == _generate("icalendar", days)
+
+
+def test_fold_line():
+    assert _fold_line("a" * 74) == "a" * 74
+    assert _fold_line("a" * 75) == "a" * 74 + "\r\n a"
+    folded = _fold_line("中" * 30)
+    assert [len(i.encode("utf-8")) for i in folded.split("\r\n")] == [72, 19]
@@ -0,0 +1,149 @@
+"""On-disk HTTP response cache."""
+
+import hashlib
+import json
+import os
+import time
+from typing import Iterator, Optional
+
+from filetools import workspace_path
+
+
+class CacheEntry:
+    """Cached response."""
+
+    def __init__(self, url: str, meta: dict, body: bytes):
+        self.url = url
+        self.meta = meta
+        self.body = body
+
+    @property
+    def permanent(self) -> bool:
+        return bool(self.meta.get("permanent"))
+
+    @property
+    def headers(self) -> dict:
+        return self.meta.get("headers", {})
+
+    def conditional_headers(self) -> dict:
+        """Headers for conditional GET revalidation."""
+
+        ret = {}
+        if "ETag" in self.headers:
+            ret["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            ret["If-Modified-Since"] = self.headers["Last-Modified"]
+        return ret
+
+
+class HTTPCache:
+    """Content-addressed response cache keyed by url.
+
+    Each entry is stored as `{key}.json` for metadata
+    and `{key}.body` for raw response body, key is sha256 of url.
+    Entries not pinned as permanent are evicted when unused for `max_age`.
+
+    Args:
+        dirname (Optional[str]): Defaults to `.cache/http` in workspace.
+        max_age (float): Seconds to keep unused entries that not permanent.
+    """
+
+    _CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+    def __init__(self, dirname: Optional[str] = None, max_age: float = 30 * 86400):
+        self.dirname = dirname or workspace_path(".cache", "http")
+        self.max_age = max_age
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.dirname, key[:2], key + ext)
+
+    def _write_meta(self, key: str, meta: dict):
+        filename = self._path(key, ".json")
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(filename + ".tmp", filename)
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Get cached response, also marks entry as recently used."""
+
+        key = self.key(url)
+        try:
+            with open(self._path(key, ".json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(key, ".body"), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(self._path(key, ".json"))
+        return CacheEntry(url, meta, body)
+
+    def put(self, url: str, body: bytes, headers=None) -> CacheEntry:
+        """Store response, replaces existed entry."""
+
+        key = self.key(url)
+        headers = headers or {}
+        meta = dict(
+            url=url,
+            headers={k: headers[k] for k in self._CACHED_HEADERS if k in headers},
+            fetched_at=time.time(),
+        )
+        filename = self._path(key, ".body")
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(filename + ".tmp", filename)
+        self._write_meta(key, meta)
+        return CacheEntry(url, meta, body)
+
+    def pin(self, url: str) -> bool:
+        """Mark entry as permanent, it will be used without revalidation.
+
+        Returns:
+            bool: False when url not cached.
+        """
+
+        entry = self.get(url)
+        if entry is None:
+            return False
+        if not entry.permanent:
+            entry.meta["permanent"] = True
+            self._write_meta(self.key(url), entry.meta)
+        return True
+
+    def _iter_keys(self) -> Iterator[str]:
+        if not os.path.isdir(self.dirname):
+            return
+        for i in os.scandir(self.dirname):
+            if not i.is_dir():
+                continue
+            for j in os.scandir(i.path):
+                if j.name.endswith(".json"):
+                    yield j.name[: -len(".json")]
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Remove entries that not permanent and unused for `max_age`.
+
+        Returns:
+            int: Removed entry count.
+        """
+
+        now = now or time.time()
+        count = 0
+        for key in list(self._iter_keys()):
+            meta_path = self._path(key, ".json")
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("permanent"):
+                continue
+            if now - os.stat(meta_path).st_mtime < self.max_age:
+                continue
+            os.unlink(meta_path)
+            if os.path.exists(self._path(key, ".body")):
+                os.unlink(self._path(key, ".body"))
+            count += 1
+        return count
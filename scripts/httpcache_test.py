@@ -0,0 +1,79 @@
+"""Test module `httpcache`."""
+
+import os
+import time
+
+from fetch import FetchClient, parse_paper
+from httpcache import HTTPCache
+
+
+def _etag_handler(body: bytes, etag: str):
+    def handler(_, headers):
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "text/plain; charset=utf-8"}, body
+
+    return handler
+
+
+def test_revalidate(stub_server, tmp_path):
+    stub_server.route("/a", _etag_handler("内容".encode("utf-8"), '"v1"'))
+    with FetchClient(cache=HTTPCache(str(tmp_path))) as client:
+        assert client.get(stub_server.url("/a")).text == "内容"
+        resp = client.get(stub_server.url("/a"))
+        assert resp.status_code == 200
+        assert resp.text == "内容"
+    assert "If-None-Match" not in stub_server.requests[0]["headers"]
+    assert stub_server.requests[1]["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_last_modified(stub_server, tmp_path):
+    stub_server.add(
+        "/a", "old", headers={"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    )
+    stub_server.add("/a", "new")
+    with FetchClient(cache=HTTPCache(str(tmp_path))) as client:
+        assert client.get(stub_server.url("/a")).text == "old"
+        assert client.get(stub_server.url("/a")).text == "new"
+    assert (
+        stub_server.requests[1]["headers"]["If-Modified-Since"]
+        == "Wed, 21 Oct 2015 07:28:00 GMT"
+    )
+
+
+def test_params_key(stub_server, tmp_path):
+    stub_server.route("/s", lambda query, _: (200, {}, query["p"].encode()))
+    cache = HTTPCache(str(tmp_path))
+    with FetchClient(cache=cache) as client:
+        assert client.get(stub_server.url("/s"), params={"p": 0}).text == "0"
+        assert client.get(stub_server.url("/s"), params={"p": 1}).text == "1"
+    assert cache.get(stub_server.url("/s?p=1")).body == b"1"
+
+
+def test_pinned_after_parse(stub_server, tmp_path):
+    stub_server.add(
+        "/paper",
+        '<div id="UCAP-CONTENT"><p>一、清明节：4月5日放假，共1天。</p></div>',
+    )
+    cache = HTTPCache(str(tmp_path))
+    with FetchClient(cache=cache) as client:
+        first = list(parse_paper(2023, stub_server.url("/paper"), client))
+        assert cache.get(stub_server.url("/paper")).permanent
+        assert list(parse_paper(2023, stub_server.url("/paper"), client)) == first
+    assert len(stub_server.requests) == 1
+
+
+def test_evict(tmp_path):
+    cache = HTTPCache(str(tmp_path), max_age=60)
+    cache.put("http://example.com/old", b"old")
+    cache.put("http://example.com/pinned", b"pinned")
+    cache.pin("http://example.com/pinned")
+    cache.put("http://example.com/new", b"new")
+    past = time.time() - 120
+    for i in ("old", "pinned"):
+        key = cache.key("http://example.com/" + i)
+        os.utime(tmp_path / key[:2] / (key + ".json"), (past, past))
+    assert cache.evict() == 1
+    assert cache.get("http://example.com/old") is None
+    assert cache.get("http://example.com/pinned").body == b"pinned"
+    assert cache.get("http://example.com/new").body == b"new"
@@ -0,0 +1,196 @@
+"""Optional timing and counter metrics.
+
+Module functions record to the current recorder,
+default recorder discards everything, see `set_recorder`.
+"""
+
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+PROMETHEUS_PREFIX = "holiday_cn_"
+
+_LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullRecorder:
+    """Recorder that discards metrics."""
+
+    enabled = False
+
+    def count(self, name: str, value: float = 1, **labels):
+        pass
+
+    def observe(self, name: str, value: float, **labels):
+        pass
+
+    def timer(self, name: str, **labels):
+        return _NULL_TIMER
+
+
+class Recorder(NullRecorder):
+    """Recorder that keeps trace events and aggregates.
+
+    Counters are summed, observations keep count and sum,
+    series are identified by name and labels.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.events: List[dict] = []
+        self.counters: Dict[_LabelKey, float] = {}
+        self.summaries: Dict[_LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+        self._start = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> _LabelKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def _event(self, kind: str, name: str, value: float, labels: dict):
+        self.events.append(
+            dict(
+                time=round(time.time() - self._start, 6),
+                type=kind,
+                name=name,
+                value=value,
+                labels={k: str(v) for k, v in labels.items()},
+            )
+        )
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self._event("count", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self.summaries.setdefault(key, [0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+            self._event("observe", name, value, labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe elapsed seconds of block."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def write_jsonl(self, f: TextIO):
+        """Write trace events as json lines."""
+
+        with self._lock:
+            for i in self.events:
+                f.write(json.dumps(i, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, f: TextIO):
+        """Write aggregates in prometheus text format,
+        for node exporter textfile collector."""
+
+        with self._lock:
+            names = sorted(
+                {(i[0], "counter") for i in self.counters}
+                | {(i[0], "summary") for i in self.summaries}
+            )
+            for name, kind in names:
+                metric = PROMETHEUS_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+                f.write("# TYPE %s %s\n" % (metric, kind))
+                if kind == "counter":
+                    for (k, labels), v in sorted(self.counters.items()):
+                        if k == name:
+                            f.write(
+                                "%s_total%s %s\n" % (metric, _labels(labels), _num(v))
+                            )
+                    continue
+                for (k, labels), (count, total) in sorted(self.summaries.items()):
+                    if k == name:
+                        f.write(
+                            "%s_count%s %d\n%s_sum%s %s\n"
+                            % (
+                                metric,
+                                _labels(labels),
+                                count,
+                                metric,
+                                _labels(labels),
+                                _num(total),
+                            )
+                        )
+
+    def save(self, filename: str):
+        """Save as prometheus text when filename ends with `.prom`,
+        otherwise as json lines."""
+
+        with open(filename, "w", encoding="utf-8", newline="\n") as f:
+            if filename.endswith(".prom"):
+                self.write_prometheus(f)
+            else:
+                self.write_jsonl(f)
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"'
+        % (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+_recorder: NullRecorder = NullRecorder()
+
+
+def get_recorder() -> NullRecorder:
+    return _recorder
+
+
+def set_recorder(recorder: Optional[NullRecorder]) -> NullRecorder:
+    """Set current recorder, None to disable.
+
+    Returns:
+        NullRecorder: Previous recorder.
+    """
+
+    global _recorder  # pylint:disable=global-statement
+    ret = _recorder
+    _recorder = recorder or NullRecorder()
+    return ret
+
+
+def count(name: str, value: float = 1, **labels):
+    _recorder.count(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    _recorder.observe(name, value, **labels)
+
+
+def timer(name: str, **labels):
+    """Context manager that observes elapsed seconds."""
+
+    return _recorder.timer(name, **labels)
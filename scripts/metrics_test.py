@@ -0,0 +1,69 @@
+"""Test module `metrics`."""
+
+import io
+import json
+
+import pytest
+
+import metrics
+from fetch import FetchClient
+from httpcache import HTTPCache
+
+
+@pytest.fixture(name="recorder")
+def _recorder():
+    recorder = metrics.Recorder()
+    previous = metrics.set_recorder(recorder)
+    yield recorder
+    metrics.set_recorder(previous)
+
+
+def test_null_recorder():
+    assert not metrics.get_recorder().enabled
+    metrics.count("test")
+    with metrics.timer("test"):
+        pass
+
+
+def test_recorder(recorder):
+    metrics.count("requests", host="a")
+    metrics.count("requests", 2, host="a")
+    metrics.count("requests", host='b"')
+    with metrics.timer("parse_seconds"):
+        pass
+    assert recorder.counters[("requests", (("host", "a"),))] == 3
+
+    f = io.StringIO()
+    recorder.write_jsonl(f)
+    events = [json.loads(i) for i in f.getvalue().splitlines()]
+    assert [i["name"] for i in events] == ["requests"] * 3 + ["parse_seconds"]
+    assert events[-1]["type"] == "observe"
+
+    f = io.StringIO()
+    recorder.write_prometheus(f)
+    lines = f.getvalue().splitlines()
+    assert lines[0] == "# TYPE holiday_cn_parse_seconds summary"
+    assert lines[1] == "holiday_cn_parse_seconds_count 1"
+    assert lines[2].startswith("holiday_cn_parse_seconds_sum ")
+    assert lines[3:] == [
+        "# TYPE holiday_cn_requests counter",
+        'holiday_cn_requests_total{host="a"} 3',
+        'holiday_cn_requests_total{host="b\\""} 1',
+    ]
+
+
+def test_fetch_client(recorder, stub_server, tmp_path):
+    stub_server.add("/a", "a", headers={"ETag": '"1"'})
+    stub_server.add("/a", b"", status=304)
+    with FetchClient(cache=HTTPCache(str(tmp_path))) as client:
+        client.get(stub_server.url("/a"))
+        client.get(stub_server.url("/a"))
+    assert recorder.counters[("http_cache", (("result", "miss"),))] == 1
+    assert recorder.counters[("http_cache", (("result", "revalidated"),))] == 1
+    assert (
+        recorder.counters[("http_requests", (("host", "127.0.0.1"), ("status", "200")))]
+        == 1
+    )
+    assert (
+        recorder.summaries[("http_request_seconds", (("host", "127.0.0.1"),))][0] == 2
+    )
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Build reproducible release artifacts."""
+
+import argparse
+import hashlib
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from filetools import workspace_path
+from query import HolidayIndex
+
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+"""Fixed entry timestamp, earliest time zip supports."""
+
+COMPRESSIONS = {
+    "deflate": zipfile.ZIP_DEFLATED,
+}
+if hasattr(zipfile, "ZIP_ZSTANDARD"):
+    # python>=3.14
+    COMPRESSIONS["zstd"] = zipfile.ZIP_ZSTANDARD
+
+CHECKSUMS_NAME = "SHA256SUMS"
+
+
+def _atomic_write(filename: str, data: bytes):
+    with open(filename + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(filename + ".tmp", filename)
+
+
+def write_zip(
+    filename: str,
+    names: Iterable[str],
+    dirname: Optional[str] = None,
+    compression="deflate",
+) -> str:
+    """Write files to zip, output only depends on file content.
+
+    Args:
+        filename (str): Output filename.
+        names (Iterable[str]): Names relative to `dirname`, stored in sorted order.
+        dirname (Optional[str]): Defaults to workspace.
+        compression (str): Key of `COMPRESSIONS`.
+
+    Returns:
+        str: Output filename.
+    """
+
+    dirname = dirname or workspace_path()
+    compress_type = COMPRESSIONS[compression]
+    with zipfile.ZipFile(filename + ".tmp", "w") as f:
+        for name in sorted(names):
+            info = zipfile.ZipInfo(name, ZIP_DATE_TIME)
+            info.compress_type = compress_type
+            info.create_system = 3
+            info.external_attr = 0o644 << 16
+            with open(os.path.join(dirname, name), "rb") as src:
+                f.writestr(info, src.read(), compresslevel=9)
+    os.replace(filename + ".tmp", filename)
+    return filename
+
+
+def _list(dirname: str, pattern: str) -> List[str]:
+    return [i for i in os.listdir(dirname) if re.match(pattern, i)]
+
+
+def pack_json(filename: str, dirname: Optional[str] = None, **kwargs) -> str:
+    """Pack `{year}.json` files."""
+
+    dirname = dirname or workspace_path()
+    return write_zip(filename, _list(dirname, r"\d+\.json$"), dirname, **kwargs)
+
+
+def pack_ics(filename: str, dirname: Optional[str] = None, **kwargs) -> str:
+    """Pack `{year}.ics` files and `holiday-cn.ics`."""
+
+    dirname = dirname or workspace_path()
+    return write_zip(
+        filename, _list(dirname, r"(\d+|holiday-cn)\.ics$"), dirname, **kwargs
+    )
+
+
+def pack_binary(filename: str, dirname: Optional[str] = None) -> str:
+    """Write binary calendar built from `{year}.json` files."""
+
+    f = io.BytesIO()
+    HolidayIndex.load(dirname).dump_binary(f)
+    _atomic_write(filename, f.getvalue())
+    return filename
+
+
+def write_checksums(filename: str, files: Iterable[str]) -> str:
+    """Write `sha256sum` compatible checksum file, file names are basenames."""
+
+    lines = []
+    for i in sorted(files, key=os.path.basename):
+        with open(i, "rb") as f:
+            lines.append(
+                "%s  %s\n" % (hashlib.sha256(f.read()).hexdigest(), os.path.basename(i))
+            )
+    _atomic_write(filename, "".join(lines).encode("utf-8"))
+    return filename
+
+
+def build_release(
+    tag: str,
+    output_dir: Optional[str] = None,
+    dirname: Optional[str] = None,
+    jobs: int = 4,
+    compression="deflate",
+) -> List[str]:
+    """Build release artifacts concurrently.
+
+    Args:
+        tag (str): Release tag, used in filenames.
+        output_dir (Optional[str]): Defaults to `dist` in workspace.
+        dirname (Optional[str]): Data directory, defaults to workspace.
+        jobs (int): Max artifacts to build at same time.
+        compression (str): Key of `COMPRESSIONS`.
+
+    Returns:
+        List[str]: Filenames of json zip, ics zip, binary calendar
+            and checksum file.
+    """
+
+    output_dir = output_dir or workspace_path("dist")
+    os.makedirs(output_dir, exist_ok=True)
+
+    def _path(name):
+        return os.path.join(output_dir, name)
+
+    with ThreadPoolExecutor(jobs) as executor:
+        futures = [
+            executor.submit(
+                pack_json,
+                _path(f"holiday-cn-{tag}.zip"),
+                dirname,
+                compression=compression,
+            ),
+            executor.submit(
+                pack_ics,
+                _path(f"holiday-cn-ics-{tag}.zip"),
+                dirname,
+                compression=compression,
+            ),
+            executor.submit(pack_binary, _path(f"holiday-cn-{tag}.bin"), dirname),
+        ]
+        ret = [i.result() for i in futures]
+    ret.append(write_checksums(_path(CHECKSUMS_NAME), ret))
+    return ret
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("tag", help="release tag used in filenames")
+    parser.add_argument("--output", "-o", help="output directory, default is dist")
+    parser.add_argument("--jobs", "-j", type=int, default=4)
+    parser.add_argument(
+        "--compression", choices=sorted(COMPRESSIONS), default="deflate"
+    )
+    args = parser.parse_args(argv)
+
+    for i in build_release(
+        args.tag, args.output, jobs=args.jobs, compression=args.compression
+    ):
+        print(i)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Test module `pack`."""
+
+import hashlib
+import os
+import zipfile
+
+import pytest
+
+from filetools import workspace_path
+from pack import COMPRESSIONS, build_release, pack_json
+from query import HolidayIndex
+
+
+def test_reproducible(tmp_path, copy_data):
+    dirname = str(copy_data("data"))
+    first = build_release("test", str(tmp_path / "a"), dirname)
+    os.utime(os.path.join(dirname, "2024.json"))
+    second = build_release("test", str(tmp_path / "b"), dirname, jobs=1)
+    assert [os.path.basename(i) for i in first] == [
+        "holiday-cn-test.zip",
+        "holiday-cn-ics-test.zip",
+        "holiday-cn-test.bin",
+        "SHA256SUMS",
+    ]
+    for a, b in zip(first, second):
+        with open(a, "rb") as f1, open(b, "rb") as f2:
+            assert f1.read() == f2.read(), a
+
+
+def test_json_zip(tmp_path):
+    filename = pack_json(str(tmp_path / "data.zip"))
+    with zipfile.ZipFile(filename) as f:
+        names = f.namelist()
+        assert names == sorted(names)
+        assert "2024.json" in names
+        for i in f.infolist():
+            assert i.compress_type == zipfile.ZIP_DEFLATED
+            assert i.date_time == (1980, 1, 1, 0, 0, 0)
+            with open(workspace_path(i.filename), "rb") as src:
+                assert f.read(i) == src.read()
+
+
+def test_checksums(tmp_path):
+    files = build_release("test", str(tmp_path))
+    with open(files[-1], "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 3
+    for line in lines:
+        digest, name = line.split("  ")
+        with open(tmp_path / name, "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == digest
+    assert len(HolidayIndex.load_binary(files[2])) == len(HolidayIndex.load())
+
+
+def test_zstd(tmp_path):
+    if "zstd" not in COMPRESSIONS:
+        pytest.skip("zstd zip requires python>=3.14")
+    filename = pack_json(str(tmp_path / "data.zip"), compression="zstd")
+    with zipfile.ZipFile(filename) as f:
+        assert f.testzip() is None
@@ -0,0 +1,560 @@
+"""Query holiday data in constant time."""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import (
+    Any,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from filetools import workspace_path
+from day import Day, cast_date, load_days
+
+FLAG_OFF = 1
+"""Day is off, after applying weekend rule and holiday data."""
+FLAG_OVERRIDE = 2
+"""Day is listed in holiday data."""
+
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+BINARY_MAGIC = b"HLCN"
+BINARY_VERSION = 1
+# magic, version, reserved, epoch ordinal, day count, string table size
+_BINARY_HEADER = struct.Struct("<4sHHiII")
+
+
+class HolidayIndex:
+    """Dense per-day holiday index.
+
+    Each day from `epoch` has one flag byte and one name id byte,
+    name id 0 means no holiday name.
+    """
+
+    def __init__(
+        self, epoch: date, flags: Sequence[int], names: Sequence[int], name_table
+    ):
+        assert len(flags) == len(names), "flags and names length mismatch"
+        self.epoch = epoch
+        self.name_table = list(name_table)
+        self._epoch_ordinal = epoch.toordinal()
+        self._flags = flags
+        self._names = names
+        self._workday_counts = None
+        self._np_arrays = None
+
+    def __len__(self):
+        return len(self._flags)
+
+    @property
+    def end(self) -> date:
+        """Last date covered by index."""
+
+        return date.fromordinal(self._epoch_ordinal + len(self) - 1)
+
+    @classmethod
+    def from_years(cls, data: Iterable[dict]) -> "HolidayIndex":
+        """Build index from year data.
+
+        Args:
+            data (Iterable[dict]): Year data, same format as `{year}.json`.
+                Later year overrides earlier year on same date.
+
+        Returns:
+            HolidayIndex: Index covers all days of given years.
+        """
+
+        data = sorted(data, key=lambda x: x["year"])
+        if not data:
+            raise ValueError("no year data")
+        start = date(data[0]["year"], 1, 1).toordinal()
+        end = date(data[-1]["year"], 12, 31).toordinal()
+        days = [
+            (date.fromisoformat(j["date"]).toordinal(), j)
+            for i in data
+            for j in i["days"]
+        ]
+        if days:
+            start = min(start, min(i for i, _ in days))
+            end = max(end, max(i for i, _ in days))
+
+        flags = bytearray(
+            FLAG_OFF if date.fromordinal(i).weekday() >= 5 else 0
+            for i in range(start, end + 1)
+        )
+        names = bytearray(len(flags))
+        name_table = [""]
+        name_ids = {}
+        for ordinal, day in days:
+            name = day["name"]
+            if name not in name_ids:
+                assert len(name_table) < 256, "too many holiday names"
+                name_ids[name] = len(name_table)
+                name_table.append(name)
+            offset = ordinal - start
+            flags[offset] = FLAG_OVERRIDE | (FLAG_OFF if day["isOffDay"] else 0)
+            names[offset] = name_ids[name]
+        return cls(date.fromordinal(start), flags, names, name_table)
+
+    @classmethod
+    def load(cls, dirname: Optional[str] = None) -> "HolidayIndex":
+        """Load index from `{year}.json` files.
+
+        Args:
+            dirname (Optional[str]): Data directory, defaults to workspace.
+
+        Returns:
+            HolidayIndex: Loaded index.
+        """
+
+        dirname = dirname or workspace_path()
+        data = []
+        for i in os.listdir(dirname):
+            if not re.match(r"\d+\.json$", i):
+                continue
+            with open(os.path.join(dirname, i), "r", encoding="utf-8") as f:
+                data.append(json.load(f))
+        return cls.from_years(data)
+
+    @classmethod
+    def load_binary(cls, filename: Optional[str] = None) -> "HolidayIndex":
+        """Load index from binary calendar file with mmap, see `dump_binary`.
+
+        Args:
+            filename (Optional[str]): Defaults to `holiday-cn.bin` in workspace.
+
+        Raises:
+            ValueError: When file header not match.
+
+        Returns:
+            HolidayIndex: Index backed by read-only memory map.
+        """
+
+        filename = filename or workspace_path("holiday-cn.bin")
+        with open(filename, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buf) < _BINARY_HEADER.size:
+            raise ValueError("invalid binary calendar: %s" % (filename,))
+        magic, version, _, epoch, count, table_size = _BINARY_HEADER.unpack_from(buf)
+        if magic != BINARY_MAGIC:
+            raise ValueError("invalid binary calendar: %s" % (filename,))
+        if version != BINARY_VERSION:
+            raise ValueError(
+                "unsupported binary calendar version: %d: %s" % (version, filename)
+            )
+        if len(buf) != _BINARY_HEADER.size + count * 2 + table_size:
+            raise ValueError("binary calendar size mismatch: %s" % (filename,))
+        view = memoryview(buf)
+        flags = view[_BINARY_HEADER.size : _BINARY_HEADER.size + count]
+        names = view[_BINARY_HEADER.size + count : _BINARY_HEADER.size + count * 2]
+        table = bytes(view[_BINARY_HEADER.size + count * 2 :]).decode("utf-8")
+        return cls(
+            date.fromordinal(epoch),
+            flags,
+            names,
+            [""] + (table.split("\0") if table else []),
+        )
+
+    def dump_binary(self, f: BinaryIO) -> None:
+        """Write index as binary calendar.
+
+        Layout (little-endian):
+            header: magic `HLCN`, u16 version, u16 reserved,
+                i32 epoch ordinal, u32 day count, u32 string table size.
+            flags: one byte per day, see `FLAG_OFF` and `FLAG_OVERRIDE`.
+            names: one byte per day, holiday name id, 0 for no name.
+            string table: utf-8 holiday names for id 1.., separated by NUL.
+
+        Args:
+            f (BinaryIO): File to write.
+        """
+
+        table = "\0".join(self.name_table[1:]).encode("utf-8")
+        f.write(
+            _BINARY_HEADER.pack(
+                BINARY_MAGIC,
+                BINARY_VERSION,
+                0,
+                self._epoch_ordinal,
+                len(self),
+                len(table),
+            )
+        )
+        f.write(self._flags)
+        f.write(self._names)
+        f.write(table)
+
+    def _offset(self, v: date, *, allow_end=False) -> int:
+        ret = v.toordinal() - self._epoch_ordinal
+        if not 0 <= ret < len(self) + (1 if allow_end else 0):
+            raise ValueError("date out of range: %s" % (v,))
+        return ret
+
+    def _get_workday_counts(self) -> array:
+        # item `i` is workday count of days before offset `i`.
+        if self._workday_counts is None:
+            ret = array("L", [0])
+            count = 0
+            for i in self._flags:
+                if not i & FLAG_OFF:
+                    count += 1
+                ret.append(count)
+            self._workday_counts = ret
+        return self._workday_counts
+
+    def is_off_day(self, v: date) -> bool:
+        """Whether date is an off day.
+
+        Args:
+            v (date): Date to query.
+
+        Raises:
+            ValueError: When date not covered by index.
+
+        Returns:
+            bool: True for holidays and weekends that not shifted to work.
+        """
+
+        return bool(self._flags[self._offset(v)] & FLAG_OFF)
+
+    def is_workday(self, v: date) -> bool:
+        """Whether date is a workday, see `is_off_day`."""
+
+        return not self.is_off_day(v)
+
+    def is_override(self, v: date) -> bool:
+        """Whether date is listed in holiday data."""
+
+        return bool(self._flags[self._offset(v)] & FLAG_OVERRIDE)
+
+    def holiday_name(self, v: date) -> Optional[str]:
+        """Holiday name of date.
+
+        Args:
+            v (date): Date to query.
+
+        Returns:
+            Optional[str]: Holiday name, also for make-up workdays.
+                None when date not listed in holiday data.
+        """
+
+        name_id = self._names[self._offset(v)]
+        return self.name_table[name_id] if name_id else None
+
+    def iter_days(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Iterator[Day]:
+        """Iterate days listed in holiday data.
+
+        Args:
+            start (Optional[date]): Range start, included.
+                Clipped to index range, defaults to `epoch`.
+            end (Optional[date]): Range end, excluded.
+                Clipped to index range, defaults to day after `end`.
+
+        Returns:
+            Iterator[Day]: Days in date order.
+        """
+
+        fr = 0 if start is None else max(start.toordinal() - self._epoch_ordinal, 0)
+        to = len(self)
+        if end is not None:
+            to = min(max(end.toordinal() - self._epoch_ordinal, 0), to)
+        flags, names = self._flags, self._names
+        for i in range(fr, to):
+            flag = flags[i]
+            if flag & FLAG_OVERRIDE:
+                yield Day(
+                    self.name_table[names[i]],
+                    date.fromordinal(self._epoch_ordinal + i),
+                    bool(flag & FLAG_OFF),
+                )
+
+    def workdays_between(self, start: date, end: date) -> int:
+        """Count workdays in range.
+
+        Args:
+            start (date): Range start, included.
+            end (date): Range end, excluded.
+
+        Returns:
+            int: Workday count, negative when `end` is before `start`.
+        """
+
+        counts = self._get_workday_counts()
+        return (
+            counts[self._offset(end, allow_end=True)]
+            - counts[self._offset(start, allow_end=True)]
+        )
+
+    def add_workdays(self, v: date, n: int) -> date:
+        """Get the n-th workday after date.
+
+        Args:
+            v (date): Start date, not counted.
+            n (int): Workday count, negative for workday before date.
+
+        Raises:
+            ValueError: When date or result not covered by index.
+
+        Returns:
+            date: Result workday, or `v` itself when `n` is 0.
+        """
+
+        offset = self._offset(v)
+        if n == 0:
+            return v
+        counts = self._get_workday_counts()
+        if n > 0:
+            ret = bisect_left(counts, counts[offset + 1] + n) - 1
+        else:
+            ret = bisect_left(counts, counts[offset] + n + 1) - 1
+        if not 0 <= ret < len(self):
+            raise ValueError("result out of range: %s %+d workdays" % (v, n))
+        return self.epoch + timedelta(days=ret)
+
+    def next_workday(self, v: date) -> date:
+        """First workday after date."""
+
+        return self.add_workdays(v, 1)
+
+    def _get_np_arrays(self):
+        import numpy as np
+
+        if self._np_arrays is None:
+            flags = np.frombuffer(self._flags, dtype=np.uint8)
+            self._np_arrays = (
+                (flags & FLAG_OFF).astype(bool),
+                np.array(self._get_workday_counts(), dtype=np.int64),
+            )
+        return self._np_arrays
+
+    def classify(self, dates: Any) -> Tuple[Any, Any]:
+        """Classify dates in one vectorized call, requires numpy.
+
+        Args:
+            dates (Any): Array-like that can cast to `datetime64[D]`,
+                e.g. numpy array or pandas series.
+
+        Raises:
+            ValueError: When any date not covered by index.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: (off day mask, workday ordinal)
+                Workday ordinal is workday count before date,
+                difference of two ordinals is `workdays_between` result.
+        """
+
+        import numpy as np
+
+        off, counts = self._get_np_arrays()
+        offset = np.asarray(dates, dtype="datetime64[D]").astype(np.int64) - (
+            self._epoch_ordinal - _UNIX_EPOCH_ORDINAL
+        )
+        if offset.size and not (0 <= offset.min() and offset.max() < len(self)):
+            raise ValueError("date out of range")
+        return off[offset], counts[offset]
+
+
+class HolidayStore:
+    """Year data loaded on first query, for long-running processes.
+
+    Decoded years are kept in a LRU cache,
+    entry is reloaded when its file modified.
+
+    Args:
+        dirname (Optional[str]): Data directory, defaults to workspace.
+        maxsize (int): Max years to keep.
+    """
+
+    def __init__(self, dirname: Optional[str] = None, maxsize: int = 4):
+        assert maxsize > 0, "maxsize must be positive"
+        self.dirname = dirname or workspace_path()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[int, Tuple[Tuple[int, int], dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _load(self, filename: str) -> dict:
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {i.date: i for i in load_days(data["days"])}
+
+    def get_year(self, year: int) -> Optional[dict]:
+        """Listed days of a year file.
+
+        Args:
+            year (int): Year of `{year}.json`.
+
+        Returns:
+            Optional[dict]: Day by date, None when file not exists.
+        """
+
+        filename = os.path.join(self.dirname, f"{year}.json")
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            with self._lock:
+                self._cache.pop(year, None)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._cache.get(year)
+            if cached and cached[0] == signature:
+                self._cache.move_to_end(year)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        days = self._load(filename)
+        with self._lock:
+            self._cache[year] = (signature, days)
+            self._cache.move_to_end(year)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return days
+
+    def get_day(self, v: Any) -> Optional[Day]:
+        """Listed day data, next year data wins for december.
+
+        Args:
+            v (Any): Date or ISO 8601 date string.
+
+        Returns:
+            Optional[Day]: None when date not listed.
+        """
+
+        v = cast_date(v)
+        # next year paper may list end of december.
+        years = (v.year + 1, v.year) if v.month == 12 else (v.year,)
+        for year in years:
+            ret = (self.get_year(year) or {}).get(v)
+            if ret is not None:
+                return ret
+        return None
+
+    def is_off_day(self, v: Any) -> bool:
+        """Same as `HolidayIndex.is_off_day`, but not checks date range."""
+
+        v = cast_date(v)
+        day = self.get_day(v)
+        if day is None:
+            return v.weekday() >= 5
+        return day.is_off_day
+
+    def is_workday(self, v: Any) -> bool:
+        return not self.is_off_day(v)
+
+    def holiday_name(self, v: Any) -> Optional[str]:
+        day = self.get_day(v)
+        return day.name if day else None
+
+
+@lru_cache(maxsize=None)
+def get_index() -> HolidayIndex:
+    """Index loaded from workspace, loaded once per process."""
+
+    return HolidayIndex.load()
+
+
+def is_off_day(v: date) -> bool:
+    return get_index().is_off_day(v)
+
+
+def is_workday(v: date) -> bool:
+    return get_index().is_workday(v)
+
+
+def holiday_name(v: date) -> Optional[str]:
+    return get_index().holiday_name(v)
+
+
+def workdays_between(start: date, end: date) -> int:
+    return get_index().workdays_between(start, end)
+
+
+def add_workdays(v: date, n: int) -> date:
+    return get_index().add_workdays(v, n)
+
+
+def next_workday(v: date) -> date:
+    return get_index().next_workday(v)
+
+
+def classify(dates: Any) -> Tuple[Any, Any]:
+    return get_index().classify(dates)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("date", type=date.fromisoformat, nargs="+")
+    parser.add_argument(
+        "--to",
+        type=date.fromisoformat,
+        help="print workday count from first date to this date (excluded)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="print nothing, exit with 1 if any date is not workday",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="load from year json files instead of `holiday-cn.bin`",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        index = HolidayIndex.load() if args.json else HolidayIndex.load_binary()
+        if args.to:
+            print(index.workdays_between(args.date[0], args.to))
+            return
+        if args.check:
+            sys.exit(0 if all(index.is_workday(i) for i in args.date) else 1)
+        # query all dates before print, so out of range date prints nothing
+        lines = [
+            json.dumps(
+                {
+                    "date": i.isoformat(),
+                    "isWorkday": index.is_workday(i),
+                    "isOffDay": index.is_off_day(i),
+                    "name": index.holiday_name(i),
+                },
+                ensure_ascii=False,
+            )
+            for i in args.date
+        ]
+    except ValueError as ex:
+        parser.error(str(ex))
+    for i in lines:
+        print(i)
+
+
+if __name__ == "__main__":
+    main()
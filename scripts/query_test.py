@@ -0,0 +1,264 @@
+"""Test module `query`."""
+
+import io
+import json
+import os
+import random
+import re
+import shutil
+import struct
+from datetime import date, timedelta
+
+import pytest
+
+from filetools import workspace_path
+from query import (
+    HolidayIndex,
+    HolidayStore,
+    add_workdays,
+    get_index,
+    next_workday,
+    workdays_between,
+)
+
+
+def _iter_year_data():
+    for i in sorted(os.listdir(workspace_path())):
+        if not re.match(r"\d+\.json$", i):
+            continue
+        with open(workspace_path(i), "r", encoding="utf-8") as f:
+            yield json.load(f)
+
+
+def test_listed_days():
+    index = get_index()
+    expected = {}
+    for data in _iter_year_data():
+        for day in data["days"]:
+            expected[date.fromisoformat(day["date"])] = day
+    for k, v in expected.items():
+        assert index.is_off_day(k) == v["isOffDay"], k
+        assert index.is_workday(k) != v["isOffDay"], k
+        assert index.is_override(k), k
+        assert index.holiday_name(k) == v["name"], k
+
+
+def test_weekend():
+    index = get_index()
+    assert index.is_off_day(date(2024, 3, 2))
+    assert index.is_workday(date(2024, 3, 4))
+    assert not index.is_override(date(2024, 3, 2))
+    assert index.holiday_name(date(2024, 3, 2)) is None
+
+
+def test_next_year_paper():
+    index = get_index()
+    # listed in 2019.json
+    assert index.is_workday(date(2018, 12, 29))
+    assert index.is_off_day(date(2018, 12, 31))
+    assert index.holiday_name(date(2018, 12, 31)) == "元旦"
+    assert index.epoch == date(2006, 12, 30)
+
+
+def test_later_year_wins():
+    index = HolidayIndex.from_years(
+        [
+            {
+                "year": 2019,
+                "days": [{"name": "元旦", "date": "2018-12-31", "isOffDay": True}],
+            },
+            {
+                "year": 2018,
+                "days": [{"name": "测试", "date": "2018-12-31", "isOffDay": False}],
+            },
+        ]
+    )
+    assert index.is_off_day(date(2018, 12, 31))
+    assert index.holiday_name(date(2018, 12, 31)) == "元旦"
+    assert index.epoch == date(2018, 1, 1)
+    assert index.end == date(2019, 12, 31)
+
+
+def test_out_of_range():
+    index = get_index()
+    with pytest.raises(ValueError):
+        index.is_off_day(date(2000, 1, 1))
+    with pytest.raises(ValueError):
+        index.is_off_day(index.end.replace(year=index.end.year + 1))
+
+
+@pytest.fixture(name="naive_workdays", scope="module")
+def _naive_workdays():
+    days = {}
+    for data in _iter_year_data():
+        for i in data["days"]:
+            days[date.fromisoformat(i["date"])] = i
+    start, end = date(2007, 1, 1), date(2027, 12, 31)
+    ret = []
+    while start <= end:
+        if start in days:
+            if not days[start]["isOffDay"]:
+                ret.append(start)
+        elif start.weekday() < 5:
+            ret.append(start)
+        start += timedelta(days=1)
+    return ret
+
+
+def test_workdays_between(naive_workdays):
+    rand = random.Random(0)
+    start, end = date(2007, 1, 1), date(2027, 12, 31)
+    span = (end - start).days
+    cases = [(start, end), (end, start), (start, start)]
+    cases += [
+        (
+            start + timedelta(days=rand.randrange(span)),
+            start + timedelta(days=rand.randrange(span)),
+        )
+        for _ in range(200)
+    ]
+    for a, b in cases:
+        expected = sum(1 for i in naive_workdays if a <= i < b) - sum(
+            1 for i in naive_workdays if b <= i < a
+        )
+        assert workdays_between(a, b) == expected, (a, b)
+
+
+def test_add_workdays(naive_workdays):
+    rand = random.Random(0)
+    start, end = date(2007, 2, 1), date(2027, 11, 30)
+    span = (end - start).days
+    for _ in range(200):
+        v = start + timedelta(days=rand.randrange(span))
+        n = rand.choice([0, 1, -1, rand.randint(-40, 40), rand.randint(-2000, 2000)])
+        if n > 0:
+            after = [i for i in naive_workdays if i > v]
+            if n > len(after):
+                continue
+            expected = after[n - 1]
+        elif n < 0:
+            before = [i for i in naive_workdays if i < v]
+            if -n > len(before):
+                continue
+            expected = before[n]
+        else:
+            expected = v
+        assert add_workdays(v, n) == expected, (v, n)
+
+
+def test_next_workday(naive_workdays):
+    for prev, cur in zip(naive_workdays, naive_workdays[1:]):
+        for i in range((cur - prev).days):
+            assert next_workday(prev + timedelta(days=i)) == cur
+
+
+def test_add_workdays_out_of_range():
+    index = get_index()
+    with pytest.raises(ValueError):
+        index.add_workdays(index.end, 1)
+    with pytest.raises(ValueError):
+        index.add_workdays(index.epoch, -1)
+
+
+def test_classify(naive_workdays):
+    np = pytest.importorskip("numpy")
+
+    dates = np.arange("2007-01-01", "2028-01-01", dtype="datetime64[D]")
+    off, ordinal = get_index().classify(dates)
+    workdays = set(naive_workdays)
+    assert off.dtype == bool
+    assert [not i for i in off.tolist()] == [
+        i in workdays for i in dates.astype(date).tolist()
+    ]
+    assert ordinal[-1] - ordinal[0] == len(naive_workdays) - (0 if off[-1] else 1)
+    assert ordinal[1000] - ordinal[10] == workdays_between(
+        dates[10].astype(date), dates[1000].astype(date)
+    )
+
+
+def test_classify_datetime():
+    np = pytest.importorskip("numpy")
+
+    dates = np.array(["2024-02-10T08:00", "2024-02-04T23:59"], dtype="datetime64[m]")
+    off, _ = get_index().classify(dates)
+    assert off.tolist() == [True, False]
+    with pytest.raises(ValueError):
+        get_index().classify(np.array(["1999-01-01"], dtype="datetime64[D]"))
+
+
+def test_binary(tmp_path):
+    index = get_index()
+    filename = str(tmp_path / "holiday-cn.bin")
+    with open(filename, "wb") as f:
+        index.dump_binary(f)
+    loaded = HolidayIndex.load_binary(filename)
+    assert loaded.epoch == index.epoch
+    assert loaded.end == index.end
+    assert loaded.name_table == index.name_table
+    v = index.epoch
+    while v <= index.end:
+        assert loaded.is_off_day(v) == index.is_off_day(v), v
+        assert loaded.holiday_name(v) == index.holiday_name(v), v
+        v += timedelta(days=1)
+    assert loaded.workdays_between(index.epoch, index.end) == index.workdays_between(
+        index.epoch, index.end
+    )
+
+
+def test_binary_committed():
+    with open(workspace_path("holiday-cn.bin"), "rb") as f:
+        committed = f.read()
+    f = io.BytesIO()
+    get_index().dump_binary(f)
+    assert committed == f.getvalue()
+
+
+def test_binary_header(tmp_path):
+    filename = str(tmp_path / "holiday-cn.bin")
+    with open(filename, "wb") as f:
+        get_index().dump_binary(f)
+    with open(filename, "r+b") as f:
+        f.seek(4)
+        f.write(struct.pack("<H", 2))
+    with pytest.raises(ValueError, match="version"):
+        HolidayIndex.load_binary(filename)
+    with open(filename, "r+b") as f:
+        f.write(b"XXXX")
+    with pytest.raises(ValueError, match="invalid"):
+        HolidayIndex.load_binary(filename)
+
+
+def test_store_same_as_index():
+    index = get_index()
+    store = HolidayStore(maxsize=2)
+    v = date(2007, 1, 1)
+    while v <= index.end:
+        assert store.is_off_day(v) == index.is_off_day(v), v
+        assert store.holiday_name(v) == index.holiday_name(v), v
+        v += timedelta(days=1)
+    assert len(store) == 2
+    assert store.is_workday("2023-01-28")
+
+
+def test_store_cache(tmp_path):
+    for i in ("2023.json", "2024.json", "2025.json"):
+        shutil.copy(workspace_path(i), tmp_path / i)
+    store = HolidayStore(str(tmp_path), maxsize=2)
+    assert store.get_year(2023)
+    assert store.get_year(2023)
+    assert (store.hits, store.misses) == (1, 1)
+    store.get_year(2024)
+    store.get_year(2025)
+    assert len(store) == 2
+    store.get_year(2023)
+    assert (store.hits, store.misses) == (1, 4)
+    assert store.get_year(2099) is None
+
+    filename = tmp_path / "2023.json"
+    data = json.loads(filename.read_text(encoding="utf-8"))
+    data["days"] = data["days"][:1]
+    filename.write_text(json.dumps(data), encoding="utf-8")
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert len(store.get_year(2023)) == 1
+    assert store.misses == 5
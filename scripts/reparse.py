@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Re-parse cached papers and compare with stored data."""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date
+from typing import Iterable, Iterator, List, Optional
+
+from changes import diff, write_changes
+from day import Day, load_days
+from fetch import PRE_PARSED_PAPERS, extract_paper, merge_days, parse_paper_text
+from filetools import workspace_path
+from httpcache import HTTPCache
+
+
+def _parse(year: int, url: str, body: Optional[bytes]) -> List[Day]:
+    if body is None:
+        return list(PRE_PARSED_PAPERS[url])
+    return parse_paper_text(
+        year, extract_paper(body.decode("utf-8", errors="replace"), url), url
+    )
+
+
+def reparse(
+    years: Iterable[int],
+    executor: Executor,
+    cache: Optional[HTTPCache] = None,
+    dirname: Optional[str] = None,
+) -> Iterator[dict]:
+    """Parse cached papers listed in stored year data again, without network.
+
+    Papers of all years are submitted to executor upfront,
+    results are merged same as `fetch_holiday`.
+
+    Args:
+        years (Iterable[int]): Years, skipped when data not stored.
+        executor (Executor): Executor for parsing papers,
+            `ProcessPoolExecutor` to use all cpu cores.
+        cache (Optional[HTTPCache]): Cache of paper pages,
+            defaults to `HTTPCache()`.
+        dirname (Optional[str]): Directory of stored data, defaults to workspace.
+
+    Returns:
+        Iterator[dict]: Result of each year in given order,
+            `days` is parsed days,
+            `missing` is urls of papers not cached,
+            `errors` is messages of papers can not be parsed,
+            `changes` is changes from stored data in `changes.diff` format,
+            empty when year has missing or error papers.
+    """
+
+    cache = cache or HTTPCache()
+    dirname = dirname or workspace_path()
+    pending = []
+    for year in years:
+        filename = os.path.join(dirname, f"{year}.json")
+        if not os.path.isfile(filename):
+            continue
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        stored = {i.date: i for i in load_days(data["days"])}
+        futures, missing = [], []
+        for url in data["papers"]:
+            body = None
+            if url not in PRE_PARSED_PAPERS:
+                entry = cache.get(url)
+                if entry is None:
+                    missing.append(url)
+                    continue
+                body = entry.body
+            futures.append((url, executor.submit(_parse, year, url, body)))
+        pending.append((year, stored, futures, missing))
+
+    for year, stored, futures, missing in pending:
+        parsed, errors = [], []
+        for url, future in futures:
+            try:
+                parsed.append(future.result())
+            except (AssertionError, RuntimeError) as ex:
+                errors.append("%s: %s" % (url, ex))
+        days = merge_days(parsed)
+        yield {
+            "year": year,
+            "days": days,
+            "missing": missing,
+            "errors": errors,
+            "changes": (
+                []
+                if missing or errors
+                else list(diff(stored, {i.date: i for i in days}))
+            ),
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "year", type=int, nargs="*", help="years to check, default is all"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="max worker processes, default is cpu count",
+    )
+    parser.add_argument("--cache-dir", help="http cache directory")
+    parser.add_argument("--data-dir", help="stored data directory")
+    args = parser.parse_args(argv)
+
+    years = args.year or range(2007, date.today().year + 2)
+    failed = False
+    count = 0
+    with ProcessPoolExecutor(max(args.jobs, 1)) as executor:
+        for i in reparse(years, executor, HTTPCache(args.cache_dir), args.data_dir):
+            for url in i["missing"]:
+                sys.stderr.write("%d: paper not cached: %s\n" % (i["year"], url))
+            for msg in i["errors"]:
+                sys.stderr.write("%d: %s\n" % (i["year"], msg))
+            failed = failed or bool(i["missing"] or i["errors"])
+            count += write_changes(
+                ({"year": i["year"], **j} for j in i["changes"]), sys.stdout
+            )
+    sys.stdout.flush()
+    if failed or count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
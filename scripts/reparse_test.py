@@ -0,0 +1,84 @@
+"""Test module `reparse`."""
+
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from benchmark import load_papers
+from day import dump_days
+from httpcache import HTTPCache
+from reparse import main, reparse
+
+
+@pytest.fixture(name="cache")
+def _cache(tmp_path):
+    ret = HTTPCache(str(tmp_path / "cache"))
+    for i in load_papers():
+        ret.put(i["url"], i["html"].encode("utf-8"))
+    return ret
+
+
+def _store_parsed(cache, dirname, year):
+    # bundled pages are synthetic, store their parsed days so tests
+    # check changes against them instead of committed data.
+    with ThreadPoolExecutor(1) as executor:
+        (got,) = reparse([year], executor, cache, str(dirname))
+    filename = dirname / f"{year}.json"
+    data = json.loads(filename.read_text(encoding="utf-8"))
+    data["days"] = dump_days(got["days"])
+    filename.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return data
+
+
+def test_reparse(cache):
+    with ProcessPoolExecutor(2) as executor:
+        got = list(reparse([2023, 2025, 3000], executor, cache))
+    assert [i["year"] for i in got] == [2023, 2025]
+    for i in got:
+        assert i["days"]
+        assert i["missing"] == []
+        assert i["errors"] == []
+
+
+def test_reparse_changes(cache, copy_data):
+    dirname = copy_data("data", 2024, 2025)
+    data = _store_parsed(cache, dirname, 2025)
+    filename = dirname / "2025.json"
+    data["days"][0]["isOffDay"] = not data["days"][0]["isOffDay"]
+    filename.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    with ThreadPoolExecutor(2) as executor:
+        got = list(reparse([2024, 2025], executor, cache, str(dirname)))
+    assert (
+        got[0]["missing"]
+        == json.loads((dirname / "2024.json").read_text(encoding="utf-8"))["papers"]
+    )
+    assert got[0]["changes"] == []
+    assert [(i["date"], i["op"]) for i in got[1]["changes"]] == [
+        (data["days"][0]["date"], "changed")
+    ]
+
+
+def test_main(cache, copy_data, capsys):
+    dirname = copy_data("data", 2025)
+    data = _store_parsed(cache, dirname, 2025)
+    argv = ["2025", "-j", "1", "--cache-dir", cache.dirname, "--data-dir", str(dirname)]
+    main(argv)
+    assert capsys.readouterr().out == ""
+
+    filename = dirname / "2025.json"
+    removed = data["days"].pop()
+    filename.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    with pytest.raises(SystemExit) as ex:
+        main(argv)
+    assert ex.value.code == 1
+    assert [json.loads(i) for i in capsys.readouterr().out.splitlines()] == [
+        {
+            "year": 2025,
+            "date": removed["date"],
+            "op": "added",
+            "old": None,
+            "new": removed,
+        }
+    ]
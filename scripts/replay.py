@@ -0,0 +1,147 @@
+"""Record and replay HTTP responses for offline fetching."""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+class Archive:
+    """Zip archive of recorded responses keyed by url.
+
+    `index.json` maps url to status, headers and body entry name,
+    bodies are stored as `{sha256 of url}.body`.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._index = {}
+        self._bodies = {}
+        self._lock = threading.Lock()
+        if os.path.exists(filename):
+            with ZipFile(filename) as f:
+                self._index = json.loads(f.read("index.json"))
+                for i in self._index.values():
+                    self._bodies[i["body"]] = f.read(i["body"])
+
+    def __contains__(self, url: str):
+        return url in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def add(self, url: str, status: int, headers: dict, body: bytes):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest() + ".body"
+        with self._lock:
+            self._index[url] = dict(status=status, headers=dict(headers), body=name)
+            self._bodies[name] = body
+
+    def get(self, url: str) -> Optional[dict]:
+        """Recorded response as dict with status, headers and body."""
+
+        with self._lock:
+            if url not in self._index:
+                return None
+            ret = dict(self._index[url])
+            ret["body"] = self._bodies[ret["body"]]
+            return ret
+
+    def save(self):
+        with self._lock:
+            dirname = os.path.dirname(self.filename)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            with ZipFile(self.filename + ".tmp", "w", ZIP_DEFLATED) as f:
+                f.writestr(
+                    "index.json",
+                    json.dumps(
+                        self._index, ensure_ascii=False, indent=2, sort_keys=True
+                    ),
+                )
+                for k in sorted(self._bodies):
+                    f.writestr(k, self._bodies[k])
+            os.replace(self.filename + ".tmp", self.filename)
+
+
+class RecordingAdapter(BaseAdapter):
+    """Adapter that records responses from wrapped adapter.
+
+    Only successful responses and redirects are recorded,
+    redirects are followed by session on replay.
+    """
+
+    _RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Location")
+
+    def __init__(self, archive: Archive, adapter: BaseAdapter):
+        super().__init__()
+        self.archive = archive
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):  # pylint:disable=arguments-differ
+        resp = self.adapter.send(request, **kwargs)
+        if resp.status_code == 200 or resp.is_redirect:
+            self.archive.add(
+                request.url,
+                resp.status_code,
+                {
+                    k: resp.headers[k]
+                    for k in self._RECORDED_HEADERS
+                    if k in resp.headers
+                },
+                resp.content,
+            )
+        return resp
+
+    def close(self):
+        self.adapter.close()
+        self.archive.save()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Adapter that serves recorded responses without network."""
+
+    def __init__(self, archive: Archive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):  # pylint:disable=arguments-differ
+        recorded = self.archive.get(request.url)
+        if recorded is None:
+            raise requests.ConnectionError(
+                "response not recorded: %s" % (request.url,), request=request
+            )
+        resp = requests.Response()
+        resp.status_code = recorded["status"]
+        resp.headers = CaseInsensitiveDict(recorded["headers"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        resp._content = recorded["body"]  # pylint:disable=protected-access
+        resp._content_consumed = True  # pylint:disable=protected-access
+        return resp
+
+    def close(self):
+        pass
+
+
+def record(session: requests.Session, archive: Archive):
+    """Record responses of session, archive is saved when session closed."""
+
+    for prefix in ("http://", "https://"):
+        session.mount(prefix, RecordingAdapter(archive, session.get_adapter(prefix)))
+
+
+def replay(session: requests.Session, archive: Archive):
+    """Serve session requests from archive."""
+
+    adapter = ReplayAdapter(archive)
+    for prefix in ("http://", "https://"):
+        session.mount(prefix, adapter)
@@ -0,0 +1,76 @@
+"""Test module `replay`."""
+
+import pytest
+import requests
+
+from fetch import FetchClient, fetch_holiday
+from replay import Archive, record, replay
+
+
+def _search_response(*urls):
+    return (
+        '{"code": 200, "msg": "", "searchVO": {"totalpage": 1, "listVO": [%s]}}'
+        % ", ".join(
+            '{"title": "关于2023年部分节假日安排的通知", "url": "%s"}' % i for i in urls
+        )
+    )
+
+
+def test_record_replay(stub_server, tmp_path):
+    stub_server.add("/search", _search_response(stub_server.url("/paper")))
+    stub_server.add(
+        "/paper",
+        '<div id="UCAP-CONTENT"><p>一、清明节：4月5日放假，共1天。</p>'
+        "<p>二、端午节：6月22日至24日放假调休，共3天。6月25日（星期日）上班。</p></div>",
+        headers={"Content-Type": "text/html; charset=utf-8"},
+    )
+    filename = str(tmp_path / "archive.zip")
+    with FetchClient(search_url=stub_server.url("/search")) as client:
+        record(client.session, Archive(filename))
+        recorded = fetch_holiday(2023, client)
+    assert len(stub_server.requests) == 2
+
+    archive = Archive(filename)
+    assert len(archive) == 2
+    assert archive.get(stub_server.url("/paper"))["headers"] == {
+        "Content-Type": "text/html; charset=utf-8"
+    }
+    stub_server.stop()
+    with FetchClient(search_url=stub_server.url("/search")) as client:
+        replay(client.session, archive)
+        assert fetch_holiday(2023, client) == recorded
+        with pytest.raises(requests.ConnectionError, match="not recorded"):
+            client.get(stub_server.url("/other"))
+    assert len(stub_server.requests) == 2
+
+
+def test_record_append(stub_server, tmp_path):
+    stub_server.add("/a", "a")
+    stub_server.add("/b", "b")
+    filename = str(tmp_path / "archive.zip")
+    for path in ("/a", "/b"):
+        with FetchClient() as client:
+            record(client.session, Archive(filename))
+            client.get(stub_server.url(path))
+    archive = Archive(filename)
+    assert archive.get(stub_server.url("/a"))["body"] == b"a"
+    assert archive.get(stub_server.url("/b"))["body"] == b"b"
+
+
+def test_record_redirect(stub_server, tmp_path):
+    stub_server.add("/old", "", status=301, headers={"Location": "/new"})
+    stub_server.add("/new", "new")
+    filename = str(tmp_path / "archive.zip")
+    with FetchClient() as client:
+        record(client.session, Archive(filename))
+        assert client.get(stub_server.url("/old")).text == "new"
+
+    archive = Archive(filename)
+    assert archive.get(stub_server.url("/old"))["status"] == 301
+    stub_server.stop()
+    with FetchClient() as client:
+        replay(client.session, archive)
+        resp = client.get(stub_server.url("/old"))
+    assert resp.text == "new"
+    assert resp.url == stub_server.url("/new")
+    assert [i.status_code for i in resp.history] == [301]
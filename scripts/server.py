@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Serve holiday data files and queries over HTTP."""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from export import export_bytes
+from filetools import workspace_path
+from query import HolidayIndex
+
+CONTENT_TYPES = {
+    ".json": "application/json; charset=utf-8",
+    ".ics": "text/calendar; charset=utf-8",
+    ".bin": "application/octet-stream",
+}
+
+_FILE_RE = re.compile(r"^/(\d+\.(?:json|ics)|holiday-cn\.(?:ics|bin))$")
+_YEAR_FILE_RE = re.compile(r"\d+\.json$")
+_EXPORT_RE = re.compile(r"^/export\.(ics|json)$")
+
+EXPORT_CACHE_SIZE = 256
+
+GZIP_MIN_SIZE = 256
+"""Smaller responses are not worth compressing."""
+
+
+class Representation:
+    """Response body with precomputed gzip variant and strong ETags."""
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self.gzip_body = None
+        if len(body) >= GZIP_MIN_SIZE:
+            self.gzip_body = gzip.compress(body, mtime=0)
+
+    @property
+    def gzip_etag(self) -> str:
+        return self.etag[:-1] + '-gzip"'
+
+
+class DataStore:
+    """Data files and query index, reloaded when files changed on disk.
+
+    Args:
+        dirname (Optional[str]): Data directory, defaults to workspace.
+        reload_interval (float): Min seconds between checking year data
+            for index reload, files are checked on every request.
+    """
+
+    def __init__(self, dirname: Optional[str] = None, reload_interval: float = 1.0):
+        self.dirname = dirname or workspace_path()
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[Tuple[int, int], Representation]] = {}
+        self._index = None
+        self._index_signature = None
+        self._checked_at = 0.0
+        self._exports: Dict[Tuple, Representation] = {}
+
+    def _stat(self, name: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.dirname, name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def file(self, name: str) -> Optional[Representation]:
+        """Get data file, None when not exists."""
+
+        signature = self._stat(name)
+        if signature is None:
+            return None
+        cached = self._files.get(name)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(os.path.join(self.dirname, name), "rb") as f:
+            body = f.read()
+        ret = Representation(body, CONTENT_TYPES[os.path.splitext(name)[1]])
+        with self._lock:
+            self._files[name] = (signature, ret)
+        return ret
+
+    def _signature(self):
+        return tuple(
+            (i, self._stat(i))
+            for i in sorted(os.listdir(self.dirname))
+            if _YEAR_FILE_RE.match(i)
+        )
+
+    def index(self) -> HolidayIndex:
+        """Get query index, rebuilt when year data changed."""
+
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.reload_interval:
+            return self._index
+        with self._lock:
+            self._checked_at = now
+            signature = self._signature()
+            if self._index is None or signature != self._index_signature:
+                self._index = HolidayIndex.load(self.dirname)
+                self._index_signature = signature
+                self._exports = {}
+            return self._index
+
+    def export(self, fmt: str, query: dict) -> Representation:
+        """Get exported data for query, cached until index reload.
+
+        Raises:
+            ValueError: When query is invalid.
+        """
+
+        index = self.index()
+        key = (fmt, tuple(sorted(query.items())))
+        ret = self._exports.get(key)
+        if ret is None:
+            ret = Representation(
+                export_bytes(
+                    fmt,
+                    index,
+                    start=_parse_date(query, "from") if "from" in query else None,
+                    end=_parse_date(query, "to") if "to" in query else None,
+                    kind=query.get("kind"),
+                    name=query.get("name"),
+                ),
+                CONTENT_TYPES["." + fmt],
+            )
+            with self._lock:
+                if len(self._exports) >= EXPORT_CACHE_SIZE:
+                    self._exports.clear()
+                self._exports[key] = ret
+        return ret
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether gzip is acceptable by `Accept-Encoding` header value.
+
+    `gzip` and `x-gzip` are matched before `*`,
+    coding with `q=0` or invalid q-value is not acceptable.
+    """
+
+    weights = {}
+    for i in accept_encoding.split(","):
+        coding, *params = [j.strip() for j in i.split(";")]
+        if not coding:
+            continue
+        weight = 1.0
+        for j in params:
+            k, _, v = j.partition("=")
+            if k.strip().lower() == "q":
+                try:
+                    weight = float(v)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    for i in ("gzip", "x-gzip", "*"):
+        if i in weights:
+            return weights[i] > 0
+    return False
+
+
+def _parse_date(query: dict, key: str) -> date:
+    if key not in query:
+        raise ValueError("missing parameter: %s" % (key,))
+    return date.fromisoformat(query[key])
+
+
+def query_is_workday(index: HolidayIndex, query: dict) -> dict:
+    v = _parse_date(query, "date")
+    return {
+        "date": v.isoformat(),
+        "isWorkday": index.is_workday(v),
+        "isOffDay": index.is_off_day(v),
+        "name": index.holiday_name(v),
+    }
+
+
+def query_workdays(index: HolidayIndex, query: dict) -> dict:
+    start = _parse_date(query, "from")
+    end = _parse_date(query, "to")
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "workdays": index.workdays_between(start, end),
+    }
+
+
+QUERIES = {
+    "/is-workday": query_is_workday,
+    "/workdays": query_workdays,
+}
+
+
+def create_handler(store: DataStore):
+    """Create request handler class that serves from store."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, rep: Representation, head_only=False):
+            use_gzip = rep.gzip_body is not None and accepts_gzip(
+                self.headers.get("Accept-Encoding", "")
+            )
+            etag = rep.gzip_etag if use_gzip else rep.etag
+            if status == HTTPStatus.OK and etag in self.headers.get(
+                "If-None-Match", ""
+            ):
+                status = HTTPStatus.NOT_MODIFIED
+            body = rep.gzip_body if use_gzip else rep.body
+            self.send_response(status)
+            self.send_header("Content-Type", rep.content_type)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            if status == HTTPStatus.NOT_MODIFIED:
+                self.end_headers()
+                return
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(body)
+
+        def _send_json(self, status: int, data: dict, head_only=False):
+            self._send(
+                status,
+                Representation(
+                    json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                    CONTENT_TYPES[".json"],
+                ),
+                head_only,
+            )
+
+        def _handle(self, head_only=False):
+            url = urlsplit(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            match = _FILE_RE.match(url.path)
+            export_match = _EXPORT_RE.match(url.path)
+            if match:
+                rep = store.file(match.group(1))
+                if rep is not None:
+                    self._send(HTTPStatus.OK, rep, head_only)
+                    return
+            elif export_match:
+                try:
+                    rep = store.export(export_match.group(1), query)
+                except ValueError as ex:
+                    self._send_json(
+                        HTTPStatus.BAD_REQUEST, {"error": str(ex)}, head_only
+                    )
+                    return
+                self._send(HTTPStatus.OK, rep, head_only)
+                return
+            elif url.path in QUERIES:
+                try:
+                    data = QUERIES[url.path](store.index(), query)
+                except ValueError as ex:
+                    self._send_json(
+                        HTTPStatus.BAD_REQUEST, {"error": str(ex)}, head_only
+                    )
+                    return
+                self._send_json(HTTPStatus.OK, data, head_only)
+                return
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"}, head_only)
+
+        def do_GET(self):
+            # pylint:disable=invalid-name
+            self._handle()
+
+        def do_HEAD(self):
+            # pylint:disable=invalid-name
+            self._handle(head_only=True)
+
+    return Handler
+
+
+def create_server(
+    host: str = "127.0.0.1", port: int = 8000, store: Optional[DataStore] = None
+) -> ThreadingHTTPServer:
+    """Create server, call `serve_forever` to start."""
+
+    store = store or DataStore()
+    store.index()
+    return ThreadingHTTPServer((host, port), create_handler(store))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--dir", help="data directory, defaults to workspace")
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=1.0,
+        help="min seconds between checking year data changes, default is 1",
+    )
+    args = parser.parse_args(argv)
+
+    server = create_server(
+        args.host, args.port, DataStore(args.dir, args.reload_interval)
+    )
+    print("Serving on http://%s:%d" % server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Test HTTP server."""
+
+import json
+import os
+import shutil
+import threading
+
+import pytest
+import requests
+
+from filetools import workspace_path
+from server import DataStore, accepts_gzip, create_server
+
+
+@pytest.fixture(name="data_dir")
+def _data_dir(tmp_path):
+    for i in ("2023.json", "2023.ics", "2024.json"):
+        shutil.copy(workspace_path(i), tmp_path / i)
+    return tmp_path
+
+
+@pytest.fixture(name="base_url")
+def _base_url(data_dir):
+    server = create_server(port=0, store=DataStore(str(data_dir), reload_interval=0))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_file(base_url, data_dir):
+    resp = requests.get(base_url + "/2023.json", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["Content-Type"] == "application/json; charset=utf-8"
+    assert resp.content == (data_dir / "2023.json").read_bytes()
+
+    resp2 = requests.get(
+        base_url + "/2023.json",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]},
+    )
+    assert resp2.status_code == 304
+    assert resp2.content == b""
+
+    resp3 = requests.get(
+        base_url + "/2023.json",
+        headers={"Accept-Encoding": "identity", "If-None-Match": resp.headers["ETag"]},
+    )
+    assert resp3.status_code == 200
+    assert "Content-Encoding" not in resp3.headers
+    assert resp3.headers["ETag"] != resp.headers["ETag"]
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("gzip", True),
+        ("gzip, deflate, br", True),
+        ("deflate, GZIP;q=0.5", True),
+        ("x-gzip", True),
+        ("*", True),
+        ("", False),
+        ("identity", False),
+        ("gzip;q=0", False),
+        ("gzip; q=0.000", False),
+        ("gzip;q=invalid", False),
+        ("identity, *;q=0", False),
+        ("gzip;q=0, *", False),
+        ("*;q=0, gzip", True),
+    ],
+)
+def test_accepts_gzip(value, expected):
+    assert accepts_gzip(value) is expected
+
+
+def test_file_gzip_refused(base_url):
+    resp = requests.get(
+        base_url + "/2023.json", headers={"Accept-Encoding": "gzip;q=0"}
+    )
+    assert resp.status_code == 200
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_file_not_found(base_url):
+    assert requests.get(base_url + "/2099.json").status_code == 404
+    assert requests.get(base_url + "/../README.md").status_code == 404
+
+
+def test_is_workday(base_url):
+    resp = requests.get(base_url + "/is-workday", params={"date": "2023-01-28"})
+    assert resp.json() == {
+        "date": "2023-01-28",
+        "isWorkday": True,
+        "isOffDay": False,
+        "name": "春节",
+    }
+    resp = requests.get(base_url + "/is-workday", params={"date": "2023-01-27"})
+    assert resp.json()["isOffDay"] is True
+
+
+def test_workdays(base_url):
+    resp = requests.get(
+        base_url + "/workdays", params={"from": "2023-01-20", "to": "2023-01-30"}
+    )
+    assert resp.json()["workdays"] == 3
+
+
+def test_bad_request(base_url):
+    for params in ({}, {"date": "bad"}, {"date": "1900-01-01"}):
+        resp = requests.get(base_url + "/is-workday", params=params)
+        assert resp.status_code == 400
+        assert "error" in resp.json()
+
+
+def test_reload(base_url, data_dir):
+    filename = data_dir / "2023.json"
+    etag = requests.get(base_url + "/2023.json").headers["ETag"]
+    data = json.loads(filename.read_text(encoding="utf-8"))
+    data["days"].append({"name": "测试", "date": "2023-03-01", "isOffDay": True})
+    filename.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    resp = requests.get(base_url + "/2023.json")
+    assert resp.headers["ETag"] != etag
+    assert resp.content == filename.read_bytes()
+    resp = requests.get(base_url + "/is-workday", params={"date": "2023-03-01"})
+    assert resp.json()["name"] == "测试"
+
+
+def test_export(base_url):
+    params = {"from": "2023-01-01", "to": "2024-01-01", "kind": "work"}
+    resp = requests.get(base_url + "/export.json", params=params)
+    assert resp.status_code == 200
+    days = resp.json()["days"]
+    assert days and not any(i["isOffDay"] for i in days)
+
+    resp = requests.get(base_url + "/export.ics", params=params)
+    assert resp.headers["Content-Type"] == "text/calendar; charset=utf-8"
+    assert resp.text.startswith("BEGIN:VCALENDAR")
+    resp2 = requests.get(
+        base_url + "/export.ics",
+        params=params,
+        headers={"If-None-Match": resp.headers["ETag"]},
+    )
+    assert resp2.status_code == 304
+
+    resp = requests.get(base_url + "/export.ics", params={"kind": "bad"})
+    assert resp.status_code == 400
@@ -2,20 +2,25 @@
 """Script for updating data."""
 
 import argparse
+import hashlib
 import json
 import os
 import re
 import subprocess
-from datetime import datetime, timedelta, tzinfo
-from tempfile import mkstemp
-from typing import Iterator
-from zipfile import ZipFile
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, tzinfo
+from tempfile import TemporaryDirectory, mkstemp
+from typing import Dict, Iterator, List, Optional
 
-from tqdm import tqdm
-
-from fetch import CustomJSONEncoder, fetch_holiday
+from changes import append_log, diff, load_snapshot, write_changes
+from day import Day, dump_days, load_days
+from fetch import CustomJSONEncoder, FetchClient, fetch_holiday, get_paper_urls_batch
 from generate_ics import generate_ics
 from filetools import workspace_path
+from httpcache import HTTPCache
+import metrics
+from pack import build_release
+from query import HolidayIndex
 
 
 class ChinaTimezone(tzinfo):
@@ -31,14 +36,95 @@ class ChinaTimezone(tzinfo):
         return timedelta()
 
 
-def update_data(year: int) -> Iterator[str]:
-    """Update and store data for a year."""
+MANIFEST_PATH = workspace_path(".manifest.json")
+
+
+def load_manifest() -> dict:
+    """Load content hashes of generated files.
+
+    Returns:
+        dict: `years` maps year to data hash, other keys map output filename
+            to hashes of its inputs.
+    """
+
+    if not os.path.isfile(MANIFEST_PATH):
+        return {"years": {}}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict) -> str:
+    with open(MANIFEST_PATH, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+        f.write("\n")
+    return MANIFEST_PATH
+
+
+def data_hash(data: dict) -> str:
+    """Content hash of year data with `Day` records, same as json content."""
+
+    return hashlib.sha256(
+        json.dumps(
+            [data["year"], data["papers"], dump_days(data["days"])],
+            ensure_ascii=False,
+            sort_keys=True,
+            cls=CustomJSONEncoder,
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def _year_hash(manifest: dict, year: int) -> Optional[str]:
+    ret = manifest["years"].get(str(year))
+    if ret:
+        return ret
+    filename = workspace_path(f"{year}.json")
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    ret = data_hash({**data, "days": load_days(data["days"])})
+    manifest["years"][str(year)] = ret
+    return ret
+
+
+def update_data(
+    year: int,
+    client: Optional[FetchClient] = None,
+    executor: Optional[Executor] = None,
+    manifest: Optional[dict] = None,
+    papers: Optional[List[str]] = None,
+) -> Iterator[str]:
+    """Update and store data for a year.
+
+    Args:
+        year (int): Year.
+        client (Optional[FetchClient]): Client for fetching.
+        executor (Optional[Executor]): Executor for fetching papers.
+        manifest (Optional[dict]): Skip writing when data hash not changed,
+            manifest is updated in place.
+        papers (Optional[List[str]]): Paper urls, search when not given.
+
+    Returns:
+        Iterator[str]: Changed filenames.
+    """
 
     json_filename = workspace_path(f"{year}.json")
     ics_filename = workspace_path(f"{year}.ics")
-    with open(json_filename, "w", encoding="utf-8", newline="\n") as f:
-        data = fetch_holiday(year)
-
+    with metrics.timer("fetch_seconds", year=year):
+        data = fetch_holiday(year, client, executor, papers)
+    if manifest is not None:
+        current_hash = data_hash(data)
+        if (
+            manifest["years"].get(str(year)) == current_hash
+            and os.path.isfile(json_filename)
+            and os.path.isfile(ics_filename)
+        ):
+            return
+        manifest["years"][str(year)] = current_hash
+    with (
+        metrics.timer("json_seconds", file=os.path.basename(json_filename)),
+        open(json_filename, "w", encoding="utf-8", newline="\n") as f,
+    ):
         json.dump(
             dict(
                 (
@@ -51,6 +137,7 @@ def update_data(year: int) -> Iterator[str]:
                         f"https://raw.githubusercontent.com/NateScarlet/holiday-cn/master/{year}.json",
                     ),
                     *data.items(),
+                    ("days", dump_days(data["days"])),
                 )
             ),
             f,
@@ -60,62 +147,267 @@ def update_data(year: int) -> Iterator[str]:
         )
 
     yield json_filename
-    generate_ics(data["days"], ics_filename)
+    with metrics.timer("ics_seconds", file=os.path.basename(ics_filename)):
+        generate_ics(data["days"], ics_filename)
     yield ics_filename
 
 
-def update_main_ics(fr_year, to_year):
+def update_year_ics(year: int) -> Optional[str]:
+    """Regenerate year ics from stored data.
+
+    Returns:
+        Optional[str]: Filename, None when year data not exists.
+    """
+
+    json_filename = workspace_path(f"{year}.json")
+    if not os.path.isfile(json_filename):
+        return None
+    with open(json_filename, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    filename = workspace_path(f"{year}.ics")
+    generate_ics(load_days(data["days"]), filename)
+    return filename
+
+
+def update_main_ics(fr_year, to_year, manifest: Optional[dict] = None) -> Optional[str]:
+    """Update merged ics.
+
+    Args:
+        fr_year (int): First year.
+        to_year (int): Last year.
+        manifest (Optional[dict]): Skip when member years not changed,
+            manifest is updated in place.
+
+    Returns:
+        Optional[str]: Filename, None when skipped.
+    """
+
+    filename = workspace_path("holiday-cn.ics")
+    if manifest is not None:
+        members = {str(i): _year_hash(manifest, i) for i in range(fr_year, to_year + 1)}
+        members = {k: v for k, v in members.items() if v}
+        if manifest.get("holiday-cn.ics") == members and os.path.isfile(filename):
+            return None
+        manifest["holiday-cn.ics"] = members
+
     all_days = []
     for year in range(fr_year, to_year + 1):
-        filename = workspace_path(f"{year}.json")
-        if not os.path.isfile(filename):
+        json_filename = workspace_path(f"{year}.json")
+        if not os.path.isfile(json_filename):
             continue
-        with open(filename, "r", encoding="utf8") as inf:
+        with open(json_filename, "r", encoding="utf8") as inf:
             data = json.loads(inf.read())
-            all_days.extend(data.get("days"))
+            all_days.extend(load_days(data["days"]))
 
-    filename = workspace_path("holiday-cn.ics")
-    generate_ics(
-        all_days,
-        filename,
-    )
+    with metrics.timer("ics_seconds", file=os.path.basename(filename)):
+        generate_ics(
+            all_days,
+            filename,
+        )
+    return filename
+
+
+def update_binary(manifest: Optional[dict] = None) -> Optional[str]:
+    """Update binary calendar of all years.
+
+    Args:
+        manifest (Optional[dict]): Skip when no year changed,
+            manifest is updated in place.
+
+    Returns:
+        Optional[str]: Filename, None when skipped.
+    """
+
+    filename = workspace_path("holiday-cn.bin")
+    if manifest is not None:
+        members = {}
+        for i in os.listdir(workspace_path()):
+            if re.match(r"\d+\.json$", i):
+                members[i[:-5]] = _year_hash(manifest, int(i[:-5]))
+        if manifest.get("holiday-cn.bin") == members and os.path.isfile(filename):
+            return None
+        manifest["holiday-cn.bin"] = members
+    with metrics.timer("binary_seconds"), open(filename, "wb") as f:
+        HolidayIndex.load().dump_binary(f)
     return filename
 
 
-def main():
-    parser = argparse.ArgumentParser()
+def load_released_snapshot() -> Dict[date, Day]:
+    """Load data snapshot of git HEAD.
+
+    Only release commits data, so this is data of last release,
+    updates staged by runs without `--release` are not included.
+
+    Returns:
+        Dict[date, Day]: Snapshot in `changes.load_snapshot` format.
+    """
+
+    names = subprocess.run(
+        ["git", "ls-tree", "--full-tree", "--name-only", "HEAD"],
+        cwd=workspace_path(),
+        check=True,
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+    ).stdout.splitlines()
+    with TemporaryDirectory() as dirname:
+        for i in names:
+            if not re.match(r"\d+\.json$", i):
+                continue
+            with open(os.path.join(dirname, i), "wb") as f:
+                f.write(
+                    subprocess.run(
+                        ["git", "show", f"HEAD:{i}"],
+                        cwd=workspace_path(),
+                        check=True,
+                        stdout=subprocess.PIPE,
+                    ).stdout
+                )
+        return load_snapshot(dirname)
+
+
+def build_ics(argv: Optional[List[str]] = None):
+    """Regenerate ics files from stored data, without fetching."""
+
+    parser = argparse.ArgumentParser(description=build_ics.__doc__)
+    parser.add_argument(
+        "year", type=int, nargs="*", help="years to regenerate, default is all"
+    )
+    args = parser.parse_args(argv)
+
+    now = datetime.now(ChinaTimezone())
+    years = args.year or sorted(
+        int(i[:-5]) for i in os.listdir(workspace_path()) if re.match(r"\d+\.json$", i)
+    )
+    for i in years:
+        filename = update_year_ics(i)
+        if filename:
+            print(filename)
+    print(update_main_ics(now.year - 4, now.year + 1))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
         "--all",
         action="store_true",
         help="Update all years since 2007, default is this year and next year",
     )
+    parser.add_argument(
+        "--batch-search",
+        action="store_true",
+        help="find papers of all years with one search query, "
+        "default is one query for each year",
+    )
     parser.add_argument(
         "--release",
         action="store_true",
         help="create new release if repository data is not up to date",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="max concurrent years and papers to fetch, default is 1",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="do not use on-disk http cache"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="write all files even if data hash not changed",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="save stage timing and counters, "
+        "as prometheus text if ends with `.prom`, otherwise as json lines",
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--record", metavar="ARCHIVE", help="record responses to zip archive"
+    )
+    group.add_argument(
+        "--replay", metavar="ARCHIVE", help="replay responses from zip archive"
+    )
+    args = parser.parse_args(argv)
 
     now = datetime.now(ChinaTimezone())
     is_release = args.release
+    recorder = None
+    if args.metrics:
+        recorder = metrics.Recorder()
+        metrics.set_recorder(recorder)
+    jobs = max(args.jobs, 1)
+    cache = None if args.no_cache or args.record or args.replay else HTTPCache()
+    tag = now.strftime("%Y.%m.%d")
+    manifest = load_manifest()
+    manifest_before = json.dumps(manifest, sort_keys=True)
+    if args.force:
+        manifest = {"years": {}}
 
     filenames = []
-    progress = tqdm(range(2007 if args.all else now.year, now.year + 2))
-    for i in progress:
-        progress.set_description(f"Updating {i} data")
-        filenames += list(update_data(i))
+    years = range(2007 if args.all else now.year, now.year + 2)
+    with (
+        FetchClient(pool_size=max(10, jobs * 2), cache=cache) as client,
+        ThreadPoolExecutor(jobs) as year_executor,
+        ThreadPoolExecutor(jobs) as paper_executor,
+    ):
+        from tqdm import tqdm
+
+        from replay import Archive, record, replay
+
+        if args.record:
+            record(client.session, Archive(args.record))
+        if args.replay:
+            replay(client.session, Archive(args.replay))
+        papers = {}
+        if args.batch_search:
+            # year-less query is not verified against recorded search
+            # responses yet, so it is opt-in.
+            with metrics.timer("search_seconds"):
+                papers = get_paper_urls_batch(years, client, paper_executor)
+        # map keeps year order, so output is same for any jobs.
+        progress = tqdm(
+            zip(
+                years,
+                year_executor.map(
+                    lambda year: list(
+                        update_data(
+                            year, client, paper_executor, manifest, papers.get(year)
+                        )
+                    ),
+                    years,
+                ),
+            ),
+            total=len(years),
+        )
+        for year, i in progress:
+            progress.set_description(f"Updated {year} data")
+            filenames += i
+    if cache:
+        cache.evict()
     progress.set_description("Updating holiday-cn.ics")
-    filenames.append(update_main_ics(now.year - 4, now.year + 1))
+    filenames.append(update_main_ics(now.year - 4, now.year + 1, manifest))
+    progress.set_description("Updating holiday-cn.bin")
+    filenames.append(update_binary(manifest))
+    if json.dumps(manifest, sort_keys=True) != manifest_before:
+        filenames.append(save_manifest(manifest))
+    filenames = [i for i in filenames if i]
     print("")
+    if recorder:
+        recorder.save(args.metrics)
 
-    subprocess.run(["git", "add", *filenames], check=True)
-    diff = subprocess.run(
+    if filenames:
+        subprocess.run(["git", "add", *filenames], check=True)
+    diff_stat = subprocess.run(
         ["git", "diff", "--stat", "--cached", "*.json", "*.ics"],
         check=True,
         stdout=subprocess.PIPE,
         encoding="utf-8",
     ).stdout
-    if not diff:
+    if not diff_stat:
         print("Already up to date.")
         return
 
@@ -123,6 +415,12 @@ def main():
         print("Updated repository data, skip release since not specified `--release`")
         return
 
+    # compare with last release, data may be staged by previous runs
+    changes = list(diff(load_released_snapshot(), load_snapshot(workspace_path())))
+    changes_log = append_log(changes, tag)
+    if changes_log:
+        subprocess.run(["git", "add", changes_log], check=True)
+
     subprocess.run(
         [
             "git",
@@ -136,13 +434,14 @@ def main():
     )
     subprocess.run(["git", "push"], check=True)
 
-    tag = now.strftime("%Y.%m.%d")
     temp_note_fd, temp_note_name = mkstemp()
     with open(temp_note_fd, "w", encoding="utf-8") as f:
-        f.write(tag + "\n\n```diff\n" + diff + "\n```\n")
-    os.makedirs(workspace_path("dist"), exist_ok=True)
-    zip_path = workspace_path("dist", f"holiday-cn-{tag}.zip")
-    pack_data(zip_path)
+        f.write(tag + "\n\n```diff\n" + diff_stat + "\n```\n")
+        if changes:
+            f.write("\n```jsonl\n")
+            write_changes(changes, f)
+            f.write("```\n")
+    json_zip, ics_zip, binary, checksums = build_release(tag, jobs=max(jobs, 3))
 
     subprocess.run(
         [
@@ -152,22 +451,15 @@ def main():
             "-F",
             temp_note_name,
             tag,
-            f"{zip_path}#JSON数据",
+            f"{json_zip}#JSON数据",
+            f"{ics_zip}#ICalendar数据",
+            f"{binary}#二进制日历",
+            f"{checksums}#SHA256校验和",
         ],
         check=True,
     )
     os.unlink(temp_note_name)
 
 
-def pack_data(file):
-    """Pack data json in zip file."""
-
-    zip_file = ZipFile(file, "w")
-    for i in os.listdir(workspace_path()):
-        if not re.match(r"\d+\.json", i):
-            continue
-        zip_file.write(workspace_path(i), i)
-
-
 if __name__ == "__main__":
     main()
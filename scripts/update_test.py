@@ -0,0 +1,110 @@
+"""Test incremental update."""
+
+import datetime
+import json
+import os
+import subprocess
+
+import pytest
+
+import update
+from day import Day, load_days
+
+
+@pytest.fixture(name="workspace")
+def _workspace(tmp_path, monkeypatch):
+    def _workspace_path(*other):
+        return os.path.join(str(tmp_path), *other)
+
+    monkeypatch.setattr(update, "workspace_path", _workspace_path)
+    monkeypatch.setattr(update, "MANIFEST_PATH", _workspace_path(".manifest.json"))
+
+    data = {
+        2023: {
+            "year": 2023,
+            "papers": ["http://www.gov.cn/2023.htm"],
+            "days": [
+                Day("元旦", datetime.date(2023, 1, 1), True),
+            ],
+        },
+        2024: {
+            "year": 2024,
+            "papers": ["http://www.gov.cn/2024.htm"],
+            "days": [
+                Day("元旦", datetime.date(2024, 1, 1), True),
+            ],
+        },
+    }
+    monkeypatch.setattr(update, "fetch_holiday", lambda year, *_: data[year])
+    return tmp_path, data
+
+
+def _run(manifest):
+    ret = []
+    for year in (2023, 2024):
+        ret.extend(update.update_data(year, manifest=manifest))
+    ret.append(update.update_main_ics(2023, 2024, manifest))
+    return [i for i in ret if i]
+
+
+def _mtimes(dirname):
+    return {i.name: i.stat().st_mtime_ns for i in dirname.iterdir()}
+
+
+def test_unchanged_skip(workspace):
+    tmp_path, _ = workspace
+    manifest = update.load_manifest()
+    assert len(_run(manifest)) == 5
+    update.save_manifest(manifest)
+    before = _mtimes(tmp_path)
+
+    manifest = update.load_manifest()
+    assert _run(manifest) == []
+    assert _mtimes(tmp_path) == before
+
+
+def test_changed_year(workspace):
+    tmp_path, data = workspace
+    manifest = update.load_manifest()
+    _run(manifest)
+
+    data[2024]["days"].append(Day("春节", datetime.date(2024, 2, 10), True))
+    assert _run(manifest) == [
+        str(tmp_path / "2024.json"),
+        str(tmp_path / "2024.ics"),
+        str(tmp_path / "holiday-cn.ics"),
+    ]
+
+
+def test_hash_of_loaded_json(workspace):
+    tmp_path, data = workspace
+    list(update.update_data(2023))
+    with open(tmp_path / "2023.json", "r", encoding="utf-8") as f:
+        loaded = json.load(f)
+    loaded["days"] = load_days(loaded["days"])
+    assert update.data_hash(loaded) == update.data_hash(data[2023])
+
+
+def test_load_released_snapshot(workspace):
+    tmp_path, data = workspace
+
+    def _git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@localhost", *args],
+            cwd=tmp_path,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    _git("init")
+    _run(update.load_manifest())
+    _git("add", ".")
+    _git("commit", "-m", "release")
+
+    # run without `--release` stages data only
+    data[2024]["days"].append(Day("春节", datetime.date(2024, 2, 10), True))
+    _git("add", *_run(update.load_manifest()))
+    assert update.load_released_snapshot() == {
+        datetime.date(2023, 1, 1): data[2023]["days"][0],
+        datetime.date(2024, 1, 1): data[2024]["days"][0],
+    }